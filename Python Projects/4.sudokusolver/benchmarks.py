@@ -0,0 +1,804 @@
+#!/usr/bin/env python3
+
+# -*- coding: utf-8 -*-
+
+"""
+Sudoku solver benchmarks
+========================
+
+Headless timing harness for the solver engines in `sudokusolver.py`.
+
+Usage:
+    python benchmarks.py engines [--repeat N]
+    python benchmarks.py nodes [--repeat N]
+    python benchmarks.py singles [--count N] [--tiers easy medium hard]
+    python benchmarks.py suite [--engines mrv dlx] [--json out.json] [--update-baseline]
+    python benchmarks.py sizes [--boxes 2 3 4 5] [--count N] [--holes 0.45 0.75] [--max-nodes N]
+    python benchmarks.py vector [--copies N] [--corpora easy medium]
+    python benchmarks.py startup [--repeat N] [--update-baseline]
+    python benchmarks.py cache [--variants N] [--engine mrv] [--corpora hard classic]
+    python benchmarks.py parallel [--workers 1 2 4 8] [--corpora hard classic]
+    python benchmarks.py frames [--repeat N]
+
+The `suite` run solves the bundled corpora in `corpus/` and fails (exit 1)
+when an engine solves fewer puzzles, visits more nodes, backtracks more or
+uses more memory than recorded in `bench_baseline.json`. Wall times are
+report-only; `--gate-time` also fails on a slowdown measured relative to a
+fixed reference workload timed in the same run. The `startup` run does the same for the
+import cost of the headless paths (`python -X importtime`).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from functools import partial
+from typing import Callable, Dict, List, Optional
+
+import sudokusolver as ss
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CORPUS_DIR = os.path.join(HERE, "corpus")
+CORPORA = ["easy", "medium", "hard", "classic", "seventeen"]
+DEFAULT_BASELINE = os.path.join(HERE, "bench_baseline.json")
+DEFAULT_TOLERANCE = 0.25        # allowed slowdown / memory growth vs the baseline
+TIME_SLACK_SECONDS = 0.010      # plus this much per corpus, so timer noise on tiny totals passes
+PEAK_SLACK_KIB = 4.0            # plus this much peak memory (allocator noise on tiny peaks)
+REFERENCE_LOOPS = 200_000       # size of the solver-independent timing reference
+SIZES_HOLES = [0.45, 0.75]      # `sizes`: blank fractions (singles-only and search-heavy)
+SIZES_MAX_NODES = 20_000        # `sizes`: search nodes per puzzle before it counts as capped
+COUNT_CHECK_LIMIT = 50          # `parallel`: solutions counted per input in the serial/parallel check
+STARTUP_SLACK_US = 5000         # plus this much per startup scenario (interpreter noise)
+
+# Headless command lines timed by `startup`, and modules they must not import
+STARTUP_SCENARIOS = {
+    "import": ["-c", "import sudokusolver"],
+    "batch": ["sudokusolver.py", "--batch", os.path.join("corpus", "easy.txt"),
+              "--workers", "1", "-o", os.devnull],
+}
+HEADLESS_FORBIDDEN = ["rich", "requests", "playsound", "winsound", "numpy",
+                      "multiprocessing", "concurrent.futures"]
+
+# All engines the suite can run (the set-based reference is slow on hard grids)
+SUITE_ENGINES = dict(ss.ENGINES, sets=ss.solve_with_sets)
+
+# ======================= Helpers =======================
+
+def load_corpus(name: str) -> List[str]:
+    """Puzzles from corpus/<name>.txt (blank lines and # comments skipped)."""
+    with open(os.path.join(CORPUS_DIR, f"{name}.txt"), encoding="utf-8") as f:
+        lines = [ln.strip() for ln in f]
+    return [ln for ln in lines if ln and not ln.startswith("#")]
+
+# Well-known hard grids (Norvig's top95 + Arto Inkala's 2012 puzzle)
+HARD_PUZZLES = load_corpus("classic")
+
+def time_engine(solve: Callable, puzzles: List[str], repeat: int = 1):
+    """Best-of-`repeat` wall time for solving every puzzle once; returns (seconds, solutions)."""
+    best = float("inf")
+    solutions = []
+    for _ in range(max(1, repeat)):
+        solutions = []
+        t0 = time.perf_counter()
+        for p in puzzles:
+            board = ss.normalize_board(p)
+            if not solve(board, peek_seconds=0.0, instant=True):
+                board = None
+            solutions.append(board)
+        best = min(best, time.perf_counter() - t0)
+    return best, solutions
+
+# ======================= Benchmarks =======================
+
+def bench_engines(repeat: int = 3) -> int:
+    """Set-based reference path vs the bitmask (`solve_with_mrv`), stack and DLX engines."""
+    puzzles = HARD_PUZZLES + [ss.FALLBACK_PUZZLE]
+    t_sets, sol_sets = time_engine(ss.solve_with_sets, puzzles, repeat)
+    t_mask, sol_mask = time_engine(partial(ss.solve_with_mrv, propagate=False), puzzles, repeat)
+    t_prop, sol_prop = time_engine(ss.solve_with_mrv, puzzles, repeat)
+    t_stack, sol_stack = time_engine(ss.solve_with_stack, puzzles, repeat)
+    t_dlx, sol_dlx = time_engine(ss.solve_with_dlx, puzzles, repeat)
+
+    if sol_sets != sol_mask:
+        print("MISMATCH: bitmask engine returned different solutions", file=sys.stderr)
+        return 1
+    if sol_sets != sol_prop:
+        print("MISMATCH: bitmask + singles returned different solutions", file=sys.stderr)
+        return 1
+    if sol_sets != sol_stack:
+        print("MISMATCH: stack engine returned different solutions", file=sys.stderr)
+        return 1
+    if sol_sets != sol_dlx:
+        print("MISMATCH: dlx engine returned different solutions", file=sys.stderr)
+        return 1
+    print(f"{len(puzzles)} puzzles, best of {repeat}")
+    print(f"  sets    : {t_sets * 1000:9.1f} ms")
+    print(f"  bitmask : {t_mask * 1000:9.1f} ms   ({t_sets / t_mask:.2f}x)")
+    print(f"  +singles: {t_prop * 1000:9.1f} ms   ({t_sets / t_prop:.2f}x)")
+    print(f"  stack   : {t_stack * 1000:9.1f} ms   ({t_sets / t_stack:.2f}x)")
+    print(f"  dlx     : {t_dlx * 1000:9.1f} ms   ({t_sets / t_dlx:.2f}x)")
+    return 0
+
+def bench_nodes(repeat: int = 3) -> int:
+    """Search nodes per second: rescanning `find_mrv` vs incremental bucketed MRV.
+
+    Both run without singles propagation and branch in the same order; the
+    incremental one also backs out as soon as any cell has no candidates left.
+    """
+    engines = [
+        ("rescan (sets)", ss.solve_with_sets),
+        ("incremental", partial(ss.solve_with_mrv, propagate=False)),
+    ]
+    print(f"{len(HARD_PUZZLES)} hard puzzles, best of {repeat}")
+    for label, solve in engines:
+        best = float("inf")
+        nodes = 0
+        for _ in range(max(1, repeat)):
+            nodes = 0
+            t0 = time.perf_counter()
+            for p in HARD_PUZZLES:
+                st = ss.SolveStats()
+                solve(ss.normalize_board(p), peek_seconds=0.0, instant=True, stats=st)
+                nodes += st.nodes
+            best = min(best, time.perf_counter() - t0)
+        print(f"  {label:<14} {nodes:>8} nodes  {best * 1000:9.1f} ms  {nodes / best:>10.0f} nodes/s")
+    return 0
+
+def _singles_report(label: str, puzzles: List) -> None:
+    """Average cells filled by propagation vs search, and guesses saved by propagating."""
+    if not puzzles:
+        return
+    prop = searched = guesses = plain_guesses = 0
+    for p in puzzles:
+        st = ss.SolveStats()
+        ss.solve_with_mrv(ss.normalize_board(p), peek_seconds=0.0, instant=True, stats=st)
+        plain = ss.SolveStats()
+        ss.solve_with_mrv(ss.normalize_board(p), peek_seconds=0.0, instant=True,
+                          propagate=False, stats=plain)
+        prop += st.propagated
+        searched += st.searched
+        guesses += st.guesses
+        plain_guesses += plain.guesses
+    n = len(puzzles)
+    print(f"  {label:<12} n={n:<4} singles={prop / n:5.1f}  search={searched / n:5.1f}  "
+          f"guesses={guesses / n:8.1f}  (without singles: {plain_guesses / n:8.1f})")
+
+def bench_singles(api_url: str, count: int, tiers: List[str]) -> int:
+    """How much search the naked/hidden singles pass saves, per API difficulty tier."""
+    print("Cells filled per puzzle (averages):")
+    for tier in tiers:
+        puzzles = []
+        for _ in range(count):
+            try:
+                puzzles.append(ss.fetch_puzzle(api_url, tier).get("puzzle"))
+            except Exception as e:
+                print(f"  {tier:<12} fetch failed ({e})")
+                break
+        _singles_report(tier, puzzles)
+    _singles_report("hard corpus", HARD_PUZZLES)
+    return 0
+
+def reference_workload(loops: int = REFERENCE_LOOPS) -> int:
+    """Fixed bit-twiddling loop, independent of the solver code, used to normalise suite times."""
+    masks, acc = [1 << (k % 9) for k in range(81)], 0
+    for i in range(loops):
+        acc = (acc ^ masks[i % 81]) & 0x1FF
+        acc += (acc & -acc).bit_length()
+    return acc
+
+def reference_seconds(repeat: int = 5) -> float:
+    """Best-of-`repeat` wall time of `reference_workload`."""
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        reference_workload()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def measure_puzzle(solve: Callable, puzzle: str, repeat: int = 1) -> Dict:
+    """Best-of-`repeat` wall time, search counters and traced peak memory for one puzzle."""
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        board = ss.Board.parse(puzzle)
+        st = ss.SolveStats()
+        t0 = time.perf_counter()
+        ok = solve(board, peek_seconds=0.0, instant=True, stats=st)
+        best = min(best, time.perf_counter() - t0)
+
+    # Separate traced run: tracemalloc slows the solve down too much to time it.
+    board = ss.Board.parse(puzzle)
+    tracemalloc.start()
+    try:
+        solve(board, peek_seconds=0.0, instant=True)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "puzzle": puzzle,
+        "solved": bool(ok),
+        "seconds": best,
+        "nodes": st.nodes,
+        "backtracks": st.backtracks,
+        "peak_kib": peak / 1024.0,
+    }
+
+def summarize(rows: List[Dict]) -> Dict:
+    times = sorted(r["seconds"] for r in rows)
+    return {
+        "puzzles": len(rows),
+        "solved": sum(1 for r in rows if r["solved"]),
+        "total_seconds": sum(times),
+        "p50_seconds": ss.percentile(times, 50),
+        "max_seconds": times[-1] if times else 0.0,
+        "nodes": sum(r["nodes"] for r in rows),
+        "backtracks": sum(r["backtracks"] for r in rows),
+        "peak_kib": max((r["peak_kib"] for r in rows), default=0.0),
+    }
+
+def compare_to_baseline(results: Dict, baseline: Dict, tolerance: float,
+                        gate_time: bool = False) -> List[str]:
+    """Regressions of `results` vs `baseline` (both as written by `bench_suite`).
+
+    Solved / nodes / backtracks are deterministic and compared exactly. With
+    `gate_time`, times are compared in units of each run's own
+    `reference_seconds`, so a slower machine does not fail the gate; without
+    a reference in both, times are not checked.
+    """
+    problems = []
+    ref, base_ref = results.get("reference_seconds"), baseline.get("reference_seconds")
+    for engine, corpora in results["engines"].items():
+        for corpus, cur in corpora.items():
+            base = baseline.get("engines", {}).get(engine, {}).get(corpus)
+            if not base:
+                continue
+            cur, base = cur["summary"], base["summary"]
+            where = f"{engine}/{corpus}"
+            if cur["solved"] < base["solved"]:
+                problems.append(f"{where}: solved {cur['solved']} < baseline {base['solved']}")
+            if cur["nodes"] > base["nodes"]:
+                problems.append(f"{where}: {cur['nodes']} nodes > baseline {base['nodes']}")
+            if cur["backtracks"] > base["backtracks"]:
+                problems.append(f"{where}: {cur['backtracks']} backtracks > baseline {base['backtracks']}")
+            if gate_time and ref and base_ref:
+                now = (cur["total_seconds"] + TIME_SLACK_SECONDS) / ref
+                was = (base["total_seconds"] + TIME_SLACK_SECONDS) / base_ref
+                if now > was * (1 + tolerance):
+                    problems.append(f"{where}: {now:.2f} x reference > baseline "
+                                    f"{was:.2f} x (+{tolerance:.0%} allowed)")
+            if cur["peak_kib"] > base["peak_kib"] * (1 + tolerance) + PEAK_SLACK_KIB:
+                problems.append(f"{where}: peak {cur['peak_kib']:.0f} KiB > baseline "
+                                f"{base['peak_kib']:.0f} KiB (+{tolerance:.0%} allowed)")
+    return problems
+
+def bench_suite(engines: List[str], corpora: List[str], repeat: int = 3,
+                json_path: Optional[str] = None, baseline_path: str = DEFAULT_BASELINE,
+                update_baseline: bool = False, tolerance: float = DEFAULT_TOLERANCE,
+                gate_time: bool = False) -> int:
+    """Per-puzzle time / nodes / backtracks / peak memory over the corpora, checked against a baseline."""
+    ss.cover_matrix()                      # built once per process; keep it out of the numbers
+    ref = reference_seconds()
+    results = {
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()}",
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "repeat": repeat,
+        "engines": {},
+    }
+    print(f"Reference workload: {ref * 1000:.1f} ms")
+    print(f"{'engine/corpus':<18} {'solved':>7} {'total ms':>10} {'x ref':>7} {'p50 ms':>8} {'max ms':>9} "
+          f"{'nodes':>8} {'backtr':>8} {'peak KiB':>9}")
+    for engine in engines:
+        solve = SUITE_ENGINES[engine]
+        for corpus in corpora:
+            rows = [measure_puzzle(solve, p, repeat) for p in load_corpus(corpus)]
+            summary = summarize(rows)
+            results["engines"].setdefault(engine, {})[corpus] = {"summary": summary, "puzzles": rows}
+            print(f"{engine + '/' + corpus:<18} {summary['solved']:>3}/{summary['puzzles']:<3} "
+                  f"{summary['total_seconds'] * 1000:>10.1f} {summary['total_seconds'] / ref:>7.3f} "
+                  f"{summary['p50_seconds'] * 1000:>8.2f} "
+                  f"{summary['max_seconds'] * 1000:>9.2f} {summary['nodes']:>8} "
+                  f"{summary['backtracks']:>8} {summary['peak_kib']:>9.1f}")
+
+    # Timed at both ends of the run; the faster one is the machine at its quietest.
+    results["reference_seconds"] = min(ref, reference_seconds())
+
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1)
+        print(f"Results written to {json_path}")
+
+    if update_baseline:
+        merged = {"engines": {}}
+        if os.path.exists(baseline_path):
+            with open(baseline_path, encoding="utf-8") as f:
+                merged = json.load(f)
+        for engine, corpora_results in results["engines"].items():
+            for corpus, res in corpora_results.items():       # summaries only
+                merged["engines"].setdefault(engine, {})[corpus] = {"summary": res["summary"]}
+        merged.update({k: v for k, v in results.items() if k != "engines"})
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(merged, f, indent=1)
+        print(f"Baseline updated: {baseline_path}")
+        return 0
+
+    if not os.path.exists(baseline_path):
+        print(f"No baseline at {baseline_path}; run with --update-baseline to record one.")
+        return 0
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    problems = compare_to_baseline(results, baseline, tolerance, gate_time)
+    if problems:
+        print("REGRESSIONS vs baseline:", file=sys.stderr)
+        for line in problems:
+            print(f"  {line}", file=sys.stderr)
+        return 1
+    checked = f"times within {tolerance:.0%} of the reference" if gate_time else "times not gated"
+    print(f"No regressions vs baseline ({baseline.get('created', '?')}, {checked}).")
+    return 0
+
+def random_grid_puzzle(n: int, holes: float, rng: random.Random) -> List[List[int]]:
+    """A valid N x N grid (N = n * n) from a shuffled pattern, with a `holes` fraction blanked.
+
+    Not necessarily unique; every engine just has to find some solution.
+    """
+    size = n * n
+    rows = [g * n + r for g in rng.sample(range(n), n) for r in rng.sample(range(n), n)]
+    cols = [g * n + c for g in rng.sample(range(n), n) for c in rng.sample(range(n), n)]
+    digits = rng.sample(range(1, size + 1), size)
+    board = [[digits[(n * (r % n) + r // n + c) % size] for c in cols] for r in rows]
+    for i in rng.sample(range(size * size), int(holes * size * size)):
+        board[i // size][i % size] = 0
+    return board
+
+def bench_sizes(boxes: List[int], count: int = 5, holes: List[float] = SIZES_HOLES,
+                seed: int = 1, max_nodes: int = SIZES_MAX_NODES) -> int:
+    """How `solve_with_bitset` scales from 4x4 to 25x25 on random pattern grids.
+
+    At 45% blanks singles finish almost every grid, so that row measures
+    setup and propagation; at 75% the search has to branch. Past about half
+    blank, 25x25 times get heavy-tailed (one early wrong guess can cost
+    minutes), so each puzzle stops at `max_nodes` and is counted as capped.
+    """
+    print(f"{count} puzzles per size, seed {seed}, at most {max_nodes} nodes per puzzle")
+    print(f"{'blank':>5} {'grid':<8} {'p50 ms':>9} {'max ms':>9} {'p50 nodes':>9} {'max nodes':>9} "
+          f"{'capped':>6} {'us/node':>8} {'vs 9x9':>8}")
+    for frac in holes:
+        base = None
+        for n in boxes:
+            rng = random.Random(seed * 100 + n)
+            ss.grid_geometry(n)                # tables are built once per size; keep that out
+            times, nodes, capped = [], [], 0
+            for _ in range(count):
+                board = random_grid_puzzle(n, frac, rng)
+                st = ss.SolveStats()
+                t0 = time.perf_counter()
+                res = ss.solve_with_bitset(board, peek_seconds=0.0, instant=True, stats=st,
+                                           budget=ss.SolveBudget(max_nodes=max_nodes))
+                times.append(time.perf_counter() - t0)
+                nodes.append(st.nodes)
+                if res.stopped:
+                    capped += 1
+                elif not res:
+                    print(f"  {n * n}x{n * n}: unsolved puzzle", file=sys.stderr)
+                    return 1
+            times.sort()
+            nodes.sort()
+            p50 = ss.percentile(times, 50)
+            if n == 3:
+                base = p50
+            ratio = f"{p50 / base:7.1f}x" if base else "       -"
+            print(f"{frac:>5.0%} {f'{n * n}x{n * n}':<8} {p50 * 1000:9.2f} {times[-1] * 1000:9.2f} "
+                  f"{ss.percentile(nodes, 50):>9.0f} {nodes[-1]:>9} {capped:>6} "
+                  f"{sum(times) / max(1, sum(nodes)) * 1e6:8.1f} {ratio}")
+    print("nodes = search nodes per puzzle (1 = singles alone solved it); capped = stopped at the node cap")
+    return 0
+
+def bench_vector(corpora: List[str], copies: int = 50, repeat: int = 3) -> int:
+    """NumPy `solve_many` vs one `solve_with_mrv` call per puzzle, on the corpora repeated `copies` times."""
+    puzzles = [p for name in corpora for p in load_corpus(name)] * max(1, copies)
+    boards = [ss.Board.parse(p) for p in puzzles]
+    print(f"{len(boards)} puzzles ({', '.join(corpora)} x {copies}), best of {repeat}")
+
+    def scalar_singles():
+        for b in boards:
+            ss._MaskGrid(b.copy()).fill_singles([])
+
+    def scalar_solve():
+        return [b if ss.solve_with_mrv(b, peek_seconds=0.0, instant=True) else None
+                for b in (b.copy() for b in boards)]
+
+    def best_of(fn):
+        best, out = float("inf"), None
+        for _ in range(max(1, repeat)):
+            t0 = time.perf_counter()
+            out = fn()
+            best = min(best, time.perf_counter() - t0)
+        return best, out
+
+    t_ss, _ = best_of(scalar_singles)
+    t_vs, _ = best_of(lambda: ss.propagate_many(boards))
+    t_sc, expected = best_of(scalar_solve)
+    counts = {}
+    t_vc, got = best_of(lambda: ss.solve_many(boards, stats=counts))
+    if got != expected:
+        print("MISMATCH: vectorized and scalar solutions differ", file=sys.stderr)
+        return 1
+    n = len(boards)
+    print(f"  singles only  scalar {n / t_ss:>9.0f}/s   numpy {n / t_vs:>9.0f}/s   ({t_ss / t_vs:.1f}x)")
+    print(f"  full solve    scalar {n / t_sc:>9.0f}/s   numpy {n / t_vc:>9.0f}/s   ({t_sc / t_vc:.1f}x)")
+    print(f"  settled by vectorized singles: {counts['propagated']}/{n}, "
+          f"searched: {counts['searched']}, contradictions: {counts['contradiction']}")
+    return 0
+
+def bench_cache(corpora: List[str], variants: int = 4, engine: str = "mrv", seed: int = 1) -> int:
+    """`SolveCache` on random symmetric variants of each corpus puzzle vs solving every one.
+
+    Per corpus: plain solve time, a cold pass (LRU + new SQLite file), a warm
+    pass (fresh LRU, same file, so every hit comes from disk) and what
+    canonicalization cost against the solve time the hits saved.
+    """
+    import tempfile
+    rng = random.Random(seed)
+    solve = ss.ENGINES[engine]
+    print(f"{variants} random symmetric variants per puzzle, engine {engine}")
+    print(f"{'corpus':<10} {'puzzles':>7} {'canon ms':>9} {'solve ms':>9} {'hit %':>6} "
+          f"{'cold':>7} {'warm':>7} {'canon s':>8} {'saved s':>8} {'net s':>8}")
+    failed = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in corpora:
+            feed = []
+            for p in load_corpus(name):
+                board = ss.Board.parse(p)
+                canon = ss.canonical_form(board)[0]
+                for _ in range(max(1, variants)):
+                    variant = ss.SymmetryTransform.random(board.size, rng).apply(board)
+                    if ss.canonical_form(variant)[0] != canon:
+                        print(f"MISMATCH: {name}: a variant of {p} canonicalizes differently",
+                              file=sys.stderr)
+                        failed += 1
+                    feed.append(variant)
+            rng.shuffle(feed)
+
+            t0 = time.perf_counter()
+            expected = []
+            for b in feed:
+                work = b.copy()
+                expected.append(work if solve(work, peek_seconds=0.0, instant=True) else None)
+            t_plain = time.perf_counter() - t0
+
+            path = os.path.join(tmp, f"{name}.sqlite3")
+            passes = []
+            for _ in range(2):
+                cache = ss.SolveCache(path, engine=engine)
+                t0 = time.perf_counter()
+                got = [cache.solve(b)[0] for b in feed]
+                passes.append((time.perf_counter() - t0, cache.report()))
+                cache.close()
+                if got != expected:
+                    print(f"MISMATCH: {name}: cached solutions differ", file=sys.stderr)
+                    failed += 1
+            (t_cold, cold), (t_warm, _) = passes
+            n = len(feed)
+            print(f"{name:<10} {n:>7} {cold['canon_seconds'] / n * 1000:9.2f} {t_plain / n * 1000:9.2f} "
+                  f"{cold['hit_rate'] * 100:6.1f} {t_plain / t_cold:6.2f}x {t_plain / t_warm:6.2f}x "
+                  f"{cold['canon_seconds']:8.3f} {cold['saved_seconds']:8.3f} {cold['net_seconds']:+8.3f}")
+    print("cold/warm = plain solve time / cached time (>1x: the cache pays for itself)")
+    return 1 if failed else 0
+
+def count_cases(board: ss.Board) -> List[tuple]:
+    """(kind, board) inputs for a count check: the puzzle as given, with clues
+    taken out until it has several solutions, and with a clue that clashes."""
+    cases = [("unique", board)]
+    multi = board.copy()
+    for i, v in enumerate(multi.cells):
+        if v:
+            multi.cells[i] = 0
+            if ss.count_solutions(multi, 2) > 1:
+                cases.append(("multi", multi))
+                break
+    blank = board.cells.index(0)
+    row = blank - blank % board.size
+    clash = board.copy()
+    clash.cells[blank] = next(v for v in board.cells[row:row + board.size] if v)
+    cases.append(("unsolvable", clash))
+    return cases
+
+def check_parallel_counts(boards: List[ss.Board], workers: List[int], engine: str,
+                          limit: int = COUNT_CHECK_LIMIT) -> int:
+    """Mismatches between `ParallelSolver.count` and the serial `count_solutions`, printed per kind."""
+    cases = [case for b in boards for case in count_cases(b)]
+    expected = [ss.count_solutions(b, limit) for _, b in cases]
+    failed = 0
+    for k in workers:
+        with ss.ParallelSolver(k, engine) as ps:
+            got = [ps.count(b, limit) for _, b in cases]
+        for (kind, b), want, n in zip(cases, expected, got):
+            if n != want:
+                print(f"MISMATCH: {k} workers count {n} solution(s), serial {want} "
+                      f"({kind}: {ss.board_to_string(b)})", file=sys.stderr)
+                failed += 1
+    kinds = {}
+    for (kind, _), want in zip(cases, expected):
+        kinds.setdefault(kind, []).append(want)
+    print("count check (up to {}): {} — {}".format(
+        limit, ", ".join(f"{len(v)} {kind} ({min(v)}-{max(v)} solutions)" for kind, v in kinds.items()),
+        "ok" if not failed else f"{failed} mismatch(es)"))
+    return failed
+
+def bench_parallel(corpora: List[str], workers: List[int], engine: str = "mrv",
+                   repeat: int = 3) -> int:
+    """`ParallelSolver` at each worker count vs the serial engine, for first-solution and counting.
+
+    Pools are started and warmed up before timing, so the numbers are the
+    split + dispatch + search cost per puzzle, not process startup. Speedup
+    is serial time / parallel time; it can't beat the number of free cores.
+    Before timing, `check_parallel_counts` compares counts with the serial
+    search on unique, multi-solution and unsolvable inputs; any mismatch
+    fails the run.
+    """
+    print(f"engine {engine}, {os.cpu_count()} CPU(s), best of {repeat}, "
+          f"{ss.PARALLEL_SPLIT_FACTOR} subproblems per worker")
+    failed = check_parallel_counts([ss.Board.parse(p) for name in corpora for p in load_corpus(name)],
+                                   workers, engine)
+    print(f"{'corpus':<10} {'mode':<6} {'serial ms':>10} " +
+          " ".join(f"{f'{k}w ms':>9} {'x':>5}" for k in workers))
+    solve = ss.ENGINES[engine]
+    for name in corpora:
+        boards = [ss.Board.parse(p) for p in load_corpus(name)]
+
+        def best_of(fn):
+            best, out = float("inf"), None
+            for _ in range(max(1, repeat)):
+                t0 = time.perf_counter()
+                out = fn()
+                best = min(best, time.perf_counter() - t0)
+            return best, out
+
+        def serial_solve():
+            return [bytes(b.cells) if solve(b, peek_seconds=0.0, instant=True) else None
+                    for b in (b.copy() for b in boards)]
+
+        rows = {"solve": best_of(serial_solve),
+                "count": best_of(lambda: [ss.count_solutions(b, 2) for b in boards])}
+        timings = {"solve": [], "count": []}
+        for k in workers:
+            with ss.ParallelSolver(k, engine) as ps:
+                ps.solve(boards[0].copy())          # start the pool
+                t_solve, got = best_of(lambda: [bytes(b.cells) if ps.solve(b) else None
+                                                for b in (b.copy() for b in boards)])
+                t_count, counts = best_of(lambda: [ps.count(b, 2) for b in boards])
+            if got != rows["solve"][1] or counts != rows["count"][1]:
+                print(f"MISMATCH: {name}: {k} workers disagree with the serial search",
+                      file=sys.stderr)
+                failed += 1
+            timings["solve"].append(t_solve)
+            timings["count"].append(t_count)
+        n = len(boards)
+        for mode, (t_serial, _) in rows.items():
+            print(f"{name:<10} {mode:<6} {t_serial / n * 1000:10.2f} " +
+                  " ".join(f"{t / n * 1000:9.2f} {t_serial / t:4.2f}x" for t in timings[mode]))
+    print("x = serial time / parallel time per puzzle (>1x: splitting pays for itself)")
+    return 1 if failed else 0
+
+def bench_frames(repeat: int = 200) -> int:
+    """Per-frame cost of the party and curtain animations: build + render vs replaying frozen frames.
+
+    Renders into an in-memory truecolor console, so this is the CPU side
+    of a frame only (no terminal I/O).
+    """
+    import io
+    from collections import deque
+    if not ss._load_rich():
+        print("Rich is not installed", file=sys.stderr)
+        return 1
+    ss.console = ss.Console(file=io.StringIO(), width=100, force_terminal=True,
+                            color_system="truecolor")
+    row = deque(["🎈"] * 3 + ["🎉", "🎊", "✨"] + ["🎈"] * 3 + ["🎉", "🎊", "✨"]
+                + ["🍾", "🥂"] * 3 + ["✨", "💫", "⭐"] * 2)
+    pulse = " ".join(["🎈", "🍾", "🎊", "🥂", "✨", "🎉", "🥂", "🍾", "🎈"])
+
+    def party_frame(i: int):             # the per-frame work the dance used to do
+        lines = []
+        for k in range(6):
+            row.rotate(1 + k)
+            lines.append(" ".join(list(row)))
+        art = "\n".join(lines[:3] + [f"[bold magenta]{pulse}[/bold magenta]"] + lines[3:])
+        return ss.Panel(ss.Align.center(art, vertical="middle"), border_style="cyan",
+                        width=ss.PARTY_WIDTH)
+
+    board = ss.Board.parse(ss.FALLBACK_SOLUTION)
+
+    def per_frame(fn) -> float:
+        t0 = time.perf_counter()
+        for i in range(max(1, repeat)):
+            ss.console.print(fn(i))
+        ss.console.file.seek(0)
+        ss.console.file.truncate()
+        return (time.perf_counter() - t0) / max(1, repeat) * 1000
+
+    frozen = ss._party_frames()
+    curtain = ss._freeze(ss.render_board(board, title="Solved Sudoku (revealing…)"))
+    rows = [("party", per_frame(party_frame), per_frame(lambda i: frozen[i % len(frozen)])),
+            ("curtain", per_frame(lambda i: ss.render_board(board, title="Solved Sudoku (revealing…)")),
+             per_frame(lambda i: curtain))]
+    budget = 1000 / ss.DANCE_FPS
+    print(f"{'animation':<10} {'build ms':>9} {'cached ms':>10} {'x':>6}   (frame budget {budget:.1f} ms "
+          f"at {ss.DANCE_FPS} fps)")
+    for name, built, cached in rows:
+        print(f"{name:<10} {built:9.3f} {cached:10.3f} {built / cached:5.1f}x")
+    return 0
+
+def importtime(args: List[str]) -> Dict:
+    """Run `python -X importtime <args>`; total import µs after startup and the modules seen."""
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)     # time the cached-bytecode import users get
+    proc = subprocess.run([sys.executable, "-X", "importtime", *args], cwd=HERE, env=env,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{' '.join(args)} exited with {proc.returncode}")
+    total, modules, after_site = 0, set(), False
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        top = not name.startswith("  ")          # nested imports are indented by two spaces
+        name = name.strip()
+        if after_site:
+            modules.add(name)
+            if top:
+                total += int(cumulative)
+        elif top and name == "site":
+            after_site = True
+    return {"us": total, "modules": modules}
+
+def bench_startup(repeat: int = 5, baseline_path: str = DEFAULT_BASELINE,
+                  update_baseline: bool = False, tolerance: float = DEFAULT_TOLERANCE) -> int:
+    """Import cost of the headless command lines, checked against the baseline's "startup" entry."""
+    results, problems = {}, []
+    for scenario, args in STARTUP_SCENARIOS.items():
+        importtime(args)                           # warm the bytecode cache
+        runs = [importtime(args) for _ in range(max(1, repeat))]
+        best = min(r["us"] for r in runs)
+        loaded = sorted(m for m in HEADLESS_FORBIDDEN
+                        if any(x == m or x.startswith(m + ".") for r in runs for x in r["modules"]))
+        results[scenario] = best
+        print(f"  {scenario:<8} {best / 1000:>7.1f} ms   ({' '.join(args)})")
+        if loaded:
+            problems.append(f"{scenario}: imports {', '.join(loaded)} on the headless path")
+
+    if update_baseline:
+        merged = {}
+        if os.path.exists(baseline_path):
+            with open(baseline_path, encoding="utf-8") as f:
+                merged = json.load(f)
+        merged["startup"] = {"import_us": results, "python": platform.python_version(),
+                             "created": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(merged, f, indent=1)
+        print(f"Baseline updated: {baseline_path}")
+    elif os.path.exists(baseline_path):
+        with open(baseline_path, encoding="utf-8") as f:
+            base = json.load(f).get("startup", {}).get("import_us", {})
+        for scenario, us in results.items():
+            if scenario in base and us > base[scenario] * (1 + tolerance) + STARTUP_SLACK_US:
+                problems.append(f"{scenario}: {us / 1000:.1f} ms > baseline "
+                                f"{base[scenario] / 1000:.1f} ms (+{tolerance:.0%})")
+    if problems:
+        print("REGRESSIONS:", file=sys.stderr)
+        for line in problems:
+            print(f"  {line}", file=sys.stderr)
+        return 1
+    if not update_baseline:
+        print(f"No startup regressions (tolerance {tolerance:.0%}).")
+    return 0
+
+# ======================= Main =======================
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Headless Sudoku solver benchmarks.")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    p = sub.add_parser("engines", help="Set-based vs bitmask MRV vs stack vs DLX (same solutions, timed).")
+    p.add_argument("--repeat", type=int, default=3, help="Best of N runs (default: 3).")
+
+    p = sub.add_parser("nodes", help="Nodes/s of rescanning vs incremental MRV cell selection.")
+    p.add_argument("--repeat", type=int, default=3, help="Best of N runs (default: 3).")
+
+    p = sub.add_parser("singles", help="Cells filled by singles vs search per difficulty tier.")
+    p.add_argument("--api-url", default=ss.DEFAULT_API_URL, help="Puzzle API endpoint.")
+    p.add_argument("--count", type=int, default=10, help="Puzzles fetched per tier (default: 10).")
+    p.add_argument("--tiers", nargs="+", default=["easy", "medium", "hard"],
+                   choices=["easy", "medium", "hard"], help="API difficulty tiers.")
+
+    p = sub.add_parser("suite", help="Corpus benchmark with JSON output and baseline regression check.")
+    p.add_argument("--engines", nargs="+", default=["mrv", "dlx", "stack"],
+                   choices=sorted(SUITE_ENGINES), help="Engines to run (default: mrv dlx stack).")
+    p.add_argument("--corpora", nargs="+", default=CORPORA, choices=CORPORA,
+                   help="Bundled corpora to solve (default: all).")
+    p.add_argument("--repeat", type=int, default=3, help="Best of N timings per puzzle (default: 3).")
+    p.add_argument("--json", metavar="FILE", default=None, help="Write per-puzzle results here.")
+    p.add_argument("--baseline", metavar="FILE", default=DEFAULT_BASELINE,
+                   help="Baseline to compare against (default: bench_baseline.json).")
+    p.add_argument("--update-baseline", action="store_true",
+                   help="Record these results as the new baseline instead of comparing.")
+    p.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                   help=f"Allowed slowdown / memory growth (default: {DEFAULT_TOLERANCE}).")
+    p.add_argument("--gate-time", action="store_true",
+                   help="Also fail on a slowdown vs the reference workload (noisy on shared machines).")
+
+    p = sub.add_parser("sizes", help="Solve time of the any-size bitset engine from 4x4 to 25x25.")
+    p.add_argument("--boxes", nargs="+", type=int, default=list(ss.GRID_BOX_SIZES),
+                   choices=ss.GRID_BOX_SIZES, help="Box sizes n (grid is n² x n²; default: 2 3 4 5).")
+    p.add_argument("--count", type=int, default=5, help="Puzzles per size (default: 5).")
+    p.add_argument("--holes", nargs="+", type=float, default=SIZES_HOLES,
+                   help="Fractions of blank cells, one table block each (default: 0.45 0.75).")
+    p.add_argument("--seed", type=int, default=1, help="Random seed (default: 1).")
+    p.add_argument("--max-nodes", type=int, default=SIZES_MAX_NODES,
+                   help=f"Stop a puzzle after N search nodes and count it as capped (default: {SIZES_MAX_NODES}).")
+
+    p = sub.add_parser("vector", help="NumPy batch propagation (solve_many) vs the scalar path.")
+    p.add_argument("--corpora", nargs="+", default=CORPORA, choices=CORPORA,
+                   help="Bundled corpora to solve (default: all).")
+    p.add_argument("--copies", type=int, default=50, help="Times each corpus is repeated (default: 50).")
+    p.add_argument("--repeat", type=int, default=3, help="Best of N runs (default: 3).")
+
+    p = sub.add_parser("cache", help="Symmetry-canonical solve cache: hit rates, canonicalization cost vs savings.")
+    p.add_argument("--corpora", nargs="+", default=CORPORA, choices=CORPORA,
+                   help="Bundled corpora to draw puzzles from (default: all).")
+    p.add_argument("--variants", type=int, default=4, help="Random variants per puzzle (default: 4).")
+    p.add_argument("--engine", choices=sorted(ss.ENGINES), default="mrv", help="Solver (default: mrv).")
+    p.add_argument("--seed", type=int, default=1, help="Random seed (default: 1).")
+
+    p = sub.add_parser("parallel", help="Split-tree ParallelSolver at 1/2/4/8 workers vs the serial engine.")
+    p.add_argument("--corpora", nargs="+", default=["hard", "classic"], choices=CORPORA,
+                   help="Bundled corpora to solve (default: hard classic).")
+    p.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4, 8],
+                   help="Worker counts to time (default: 1 2 4 8).")
+    p.add_argument("--engine", choices=sorted(ss.ENGINES), default="mrv", help="Solver (default: mrv).")
+    p.add_argument("--repeat", type=int, default=3, help="Best of N runs (default: 3).")
+
+    p = sub.add_parser("frames", help="Animation frame cost: rebuilt every frame vs pre-rendered.")
+    p.add_argument("--repeat", type=int, default=200, help="Frames timed per case (default: 200).")
+
+    p = sub.add_parser("startup", help="Import time of the headless paths (-X importtime) vs the baseline.")
+    p.add_argument("--repeat", type=int, default=5, help="Best of N runs (default: 5).")
+    p.add_argument("--baseline", metavar="FILE", default=DEFAULT_BASELINE,
+                   help="Baseline to compare against (default: bench_baseline.json).")
+    p.add_argument("--update-baseline", action="store_true",
+                   help="Record these results as the new baseline instead of comparing.")
+    p.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                   help=f"Allowed slowdown (default: {DEFAULT_TOLERANCE}).")
+
+    args = parser.parse_args(argv)
+    if args.bench == "startup":
+        return bench_startup(args.repeat, args.baseline, args.update_baseline, args.tolerance)
+    if args.bench == "frames":
+        return bench_frames(args.repeat)
+    if args.bench == "parallel":
+        return bench_parallel(args.corpora, args.workers, args.engine, args.repeat)
+    if args.bench == "cache":
+        return bench_cache(args.corpora, args.variants, args.engine, args.seed)
+    if args.bench == "vector":
+        return bench_vector(args.corpora, args.copies, args.repeat)
+    if args.bench == "sizes":
+        return bench_sizes(sorted(args.boxes), args.count, args.holes, args.seed, args.max_nodes)
+    if args.bench == "suite":
+        return bench_suite(args.engines, args.corpora, args.repeat, args.json, args.baseline,
+                           args.update_baseline, args.tolerance, args.gate_time)
+    if args.bench == "engines":
+        return bench_engines(args.repeat)
+    if args.bench == "nodes":
+        return bench_nodes(args.repeat)
+    if args.bench == "singles":
+        return bench_singles(args.api_url, args.count, args.tiers)
+    return 2
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+
+# -*- coding: utf-8 -*-
+
+"""
+Load generator for the solve service (`sudokusolver.py --serve`)
+================================================================
+
+Keeps `--concurrency` requests in flight against POST /solve with puzzles
+from the bundled corpora (or any file with one puzzle per line), then prints
+throughput, client-side latency percentiles, status counts and the server's
+own /metrics.
+
+Usage:
+    python sudokusolver.py --serve 8780 --workers 4
+    python loadgen.py --url http://127.0.0.1:8780 --concurrency 16 --seconds 10
+
+    python loadgen.py --spawn --workers 2 --requests 2000   # start a server too
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from itertools import cycle
+from typing import Dict, List, Optional, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CORPUS_DIR = os.path.join(HERE, "corpus")
+
+
+def load_puzzles(paths: List[str]) -> List[str]:
+    """Puzzle lines from `paths` (blank lines and # comments skipped)."""
+    puzzles = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            puzzles += [ln.strip() for ln in f if ln.strip() and not ln.startswith("#")]
+    return puzzles
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0..100) of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, int(round(q / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[k]
+
+
+def post_solve(url: str, puzzle: str, timeout: Optional[float]) -> int:
+    """POST one puzzle; returns the HTTP status (0 on a connection error)."""
+    body = {"puzzle": puzzle}
+    if timeout is not None:
+        body["timeout"] = timeout
+    req = urllib.request.Request(url + "/solve", data=json.dumps(body).encode("utf-8"),
+                                 headers={"Content-Type": "application/json"}, method="POST")
+    try:
+        with urllib.request.urlopen(req, timeout=(timeout or 30.0) + 5.0) as resp:
+            resp.read()
+            return resp.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return 0
+
+
+def run_load(url: str, puzzles: List[str], concurrency: int, total: Optional[int],
+             seconds: float, timeout: Optional[float]) -> Dict:
+    """Closed-loop load: `concurrency` threads each send their next request as soon as one returns."""
+    feed = cycle(puzzles)
+    lock = threading.Lock()
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    sent = [0]
+    stop_at = time.perf_counter() + seconds
+
+    def next_puzzle() -> Optional[str]:
+        with lock:
+            if total is not None and sent[0] >= total:
+                return None
+            if total is None and time.perf_counter() >= stop_at:
+                return None
+            sent[0] += 1
+            return next(feed)
+
+    def client():
+        while True:
+            puzzle = next_puzzle()
+            if puzzle is None:
+                return
+            t0 = time.perf_counter()
+            status = post_solve(url, puzzle, timeout)
+            dt = time.perf_counter() - t0
+            with lock:
+                statuses[status] = statuses.get(status, 0) + 1
+                if status == 200:
+                    latencies.append(dt)
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=client, daemon=True) for _ in range(max(1, concurrency))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return {"elapsed": time.perf_counter() - t0, "latencies": sorted(latencies),
+            "statuses": statuses, "sent": sent[0]}
+
+
+def spawn_server(workers: Optional[int], engine: str) -> Tuple[subprocess.Popen, str]:
+    """Start `sudokusolver.py --serve` on a free local port and wait until it answers."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    cmd = [sys.executable, os.path.join(HERE, "sudokusolver.py"), "--serve", f"127.0.0.1:{port}",
+           "--engine", engine]
+    if workers:
+        cmd += ["--workers", str(workers)]
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 15.0
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(url + "/metrics", timeout=1.0):
+                return proc, url
+        except OSError:
+            time.sleep(0.1)
+    stop_server(proc)
+    raise RuntimeError("solve service did not start")
+
+
+def stop_server(proc: subprocess.Popen, timeout: float = 10.0) -> None:
+    """Ask a spawned service to shut down (Ctrl+C, so it closes its pool); kill it if it hangs."""
+    if proc.poll() is not None:
+        return
+    proc.send_signal(signal.SIGINT if os.name == "posix" else signal.SIGTERM)
+    try:
+        proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load generator for sudokusolver.py --serve.")
+    parser.add_argument("--url", default="http://127.0.0.1:8780", help="Service base URL.")
+    parser.add_argument("--spawn", action="store_true",
+                        help="Start a local service on a free port instead of using --url.")
+    parser.add_argument("--workers", type=int, default=None, help="With --spawn: solver processes.")
+    parser.add_argument("--engine", default="mrv", help="With --spawn: solver engine (default: mrv).")
+    parser.add_argument("--puzzles", nargs="+", default=None, metavar="FILE",
+                        help="Puzzle files, one per line (default: every corpus/*.txt).")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight (default: 8).")
+    parser.add_argument("--requests", type=int, default=None, help="Stop after N requests.")
+    parser.add_argument("--seconds", type=float, default=5.0,
+                        help="Without --requests: run this long (default: 5).")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="Per-request timeout sent to the service (default: the server's).")
+    args = parser.parse_args(argv)
+
+    paths = args.puzzles or sorted(os.path.join(CORPUS_DIR, f) for f in os.listdir(CORPUS_DIR)
+                                   if f.endswith(".txt"))
+    puzzles = load_puzzles(paths)
+    if not puzzles:
+        print("No puzzles to send.", file=sys.stderr)
+        return 1
+
+    proc = None
+    url = args.url.rstrip("/")
+    try:
+        if args.spawn:
+            proc, url = spawn_server(args.workers, args.engine)
+        res = run_load(url, puzzles, args.concurrency, args.requests, args.seconds, args.timeout)
+        with urllib.request.urlopen(url + "/metrics", timeout=5.0) as resp:
+            metrics = json.load(resp)
+    except (OSError, RuntimeError) as e:
+        print(f"Fatal error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if proc is not None:
+            stop_server(proc)
+
+    lat, elapsed = res["latencies"], res["elapsed"]
+    print(f"{res['sent']} requests in {elapsed:.2f}s ({res['sent'] / elapsed:.1f} req/s, "
+          f"concurrency {args.concurrency})")
+    print("Status: " + "  ".join(f"{code or 'conn-error'}={n}"
+                                 for code, n in sorted(res["statuses"].items())))
+    print("Client latency ms: " + "  ".join(
+        f"p{q}={percentile(lat, q) * 1000:.2f}" for q in (50, 90, 99)
+    ) + f"  max={(lat[-1] if lat else 0.0) * 1000:.2f}")
+    print("Server /metrics: " + json.dumps(metrics, indent=1))
+    return 0 if res["statuses"].get(200, 0) == res["sent"] else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
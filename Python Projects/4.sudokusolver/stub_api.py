@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+
+# -*- coding: utf-8 -*-
+
+"""
+Stand-in for the youdosudoku API (local testing)
+================================================
+
+Answers `POST /` with the same JSON shape as https://youdosudoku.com/api/,
+using puzzles from the offline generator in `sudokusolver.py`:
+
+    {"difficulty": "easy", "puzzle": ..., "solution": ...}
+
+With `"array": true` in the request body the grids are 9x9 lists of digit
+strings, otherwise 81-character strings.
+
+Usage:
+    python stub_api.py --port 8765 [--delay 0.3]
+    python sudokusolver.py --api-url http://127.0.0.1:8765/ -d easy
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional, Tuple
+
+import sudokusolver as ss
+
+
+class StubPuzzleServer(ThreadingHTTPServer):
+    """HTTP server that counts the puzzles it hands out."""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], delay: float = 0.0, seed: Optional[int] = None):
+        super().__init__(address, _Handler)
+        self.delay = delay
+        self.served = 0
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self.send_error(400, "Bad JSON")
+            return
+        diff = body.get("difficulty", "easy")
+        if diff not in ss.GENERATOR_TARGET_CLUES:
+            self.send_error(400, "Unknown difficulty")
+            return
+        if self.server.delay > 0:
+            time.sleep(self.server.delay)
+        with self.server.lock:
+            rng = random.Random(self.server.rng.random())
+        puzzle, solution, _grade = ss.generate_puzzle(diff, rng)
+
+        def shape(board: ss.Board):
+            if body.get("array"):
+                return [[str(v) for v in row] for row in board.to_list()]
+            return ss.board_to_string(board)
+
+        data = {"difficulty": diff, "puzzle": shape(puzzle)}
+        if body.get("solution", True):
+            data["solution"] = shape(solution)
+        payload = json.dumps(data).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+        with self.server.lock:
+            self.server.served += 1
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+def start_stub_server(port: int = 0, delay: float = 0.0,
+                      seed: Optional[int] = None) -> StubPuzzleServer:
+    """Serve on 127.0.0.1:`port` (0 = any free port) from a daemon thread."""
+    server = StubPuzzleServer(("127.0.0.1", port), delay=delay, seed=seed)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Local stand-in for the youdosudoku puzzle API.")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on (default: 8765).")
+    parser.add_argument("--delay", type=float, default=0.0, help="Extra seconds per response.")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for the puzzles.")
+    args = parser.parse_args(argv)
+
+    server = StubPuzzleServer(("127.0.0.1", args.port), delay=args.delay, seed=args.seed)
+    print(f"Stub puzzle API on {server.url} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"\nServed {server.served} puzzles.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
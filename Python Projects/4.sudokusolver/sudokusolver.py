@@ -20,14 +20,20 @@ Note:
 from __future__ import annotations
 
 import argparse
+import json
+import math
 import os
 import sys
 import time
-import platform
+import random
+import struct
 import threading
-from collections import deque
-from itertools import cycle
-from typing import List, Optional, Tuple
+from array import array
+from collections import OrderedDict, deque
+from dataclasses import asdict, dataclass
+from functools import partial, wraps
+from itertools import cycle, groupby, permutations
+from typing import Iterator, List, Optional, Tuple
 
 # ======================= Config (you can tweak) =======================
 
@@ -36,7 +42,24 @@ COUNTDOWN_PAUSE     = 1.2
 
 DEFAULT_PEEK_SECONDS = 2.0     # visible "fast placements" burst
 ANIM_DELAY           = 0.01
-ANIM_EVERY_STEPS     = 1
+PEEK_REFRESH_PER_SECOND = 30   # quick-peek frames per second, however fast the solver moves
+STACK_STEPS_PER_FRAME = 20     # search steps between peek frames (--engine stack)
+BUDGET_POLL_NODES    = 256     # search nodes between deadline / cancellation checks
+
+BATCH_CHUNK_SIZE     = 64      # puzzles per worker task in --batch / --check-unique
+VECTOR_CHUNK_SIZE    = 2048    # puzzles per worker task in --batch --vectorized
+PIPE_FLUSH_LINES     = 256     # --pipe: solutions written per block flush
+
+SERVE_QUEUE_SIZE     = 256     # --serve: queued requests before /solve answers 503
+SERVE_BATCH_SIZE     = 8       # --serve: most puzzles per worker task
+SERVE_BATCH_WAIT     = 0.002   # --serve: seconds a batch may wait to fill
+SERVE_TIMEOUT        = 10.0    # --serve: default / maximum per-request timeout (seconds)
+SERVE_LATENCY_WINDOW = 4096    # --serve: recent requests kept for /metrics percentiles
+
+PARALLEL_SPLIT_FACTOR = 8      # --parallel: subproblems per worker (spare ones balance the load)
+
+SOLVE_CACHE_SIZE     = 4096    # --solve-cache: canonical solutions kept in memory per process
+SOLVE_CACHE_FILE     = "solutions.sqlite3"   # --solve-cache: default file in the cache folder
 
 CURTAIN_PAUSE        = 0.10
 HIGHLIGHT_COLOR      = "yellow"
@@ -47,7 +70,12 @@ DANCE_FPS     = 14
 PARTY_WIDTH   = 60
 PARTY_MUSIC_FILE  = "party.mp3"  # must be in same folder (or use absolute path)
 
+PUZZLE_BANK_FILE  = "puzzles.bank"   # --offline: graded puzzle bank next to this script
+
 DEFAULT_API_URL   = "https://youdosudoku.com/api/"
+PUZZLE_CACHE_SIZE = 10         # puzzles kept on disk per difficulty
+PREFETCH_WORKERS  = 2          # background fetch threads (one shared HTTP session)
+PREFETCH_TIMEOUT  = (3, 10)    # connect / read seconds for background fetches
 
 # Built-in offline fallback (classic puzzle + solution)
 FALLBACK_PUZZLE = (
@@ -75,79 +103,264 @@ FALLBACK_SOLUTION = (
 
 # ======================= Optional libraries =======================
 
+# Imported on first use so headless runs (--batch, --check-unique, --generate,
+# scripts importing this module) never pay for Rich, playsound or winsound.
+
 # Rich terminal
 RICH = False
 console = None
 box = None
-try:
-    from rich.console import Console
-    from rich.table import Table
-    from rich.panel import Panel
-    from rich.prompt import Prompt
-    from rich.align import Align
-    from rich.live import Live
-    from rich import box as rich_box
-
-    console = Console()
-    box = rich_box
-    RICH = True
-except Exception:
-    RICH = False
+_RICH_TRIED = False
+
+def _load_rich() -> bool:
+    """Import Rich on first call; return True when it is available."""
+    global RICH, _RICH_TRIED, console, box
+    global Console, Table, Panel, Prompt, Align, Live, Segment, Segments, Style, cell_len
+    if _RICH_TRIED:
+        return RICH
+    _RICH_TRIED = True
+    try:
+        from rich.console import Console
+        from rich.table import Table
+        from rich.panel import Panel
+        from rich.prompt import Prompt
+        from rich.align import Align
+        from rich.live import Live
+        from rich.segment import Segment, Segments
+        from rich.style import Style
+        from rich.cells import cell_len
+        from rich import box as rich_box
+
+        console = Console()
+        box = rich_box
+        RICH = True
+    except Exception:
+        RICH = False
+    return RICH
+
+def _need_rich(what: str) -> None:
+    """Load Rich for a Rich-only renderer; raise RuntimeError naming it when Rich is missing."""
+    if not _load_rich():
+        raise RuntimeError(f"{what} needs Rich (pip install rich)")
 
 # Windows beep
-WINSOUND = None
-try:
-    if platform.system().lower().startswith("win"):
-        import winsound
-        WINSOUND = winsound
-except Exception:
-    WINSOUND = None
+_WINSOUND: list = []
+
+def _winsound():
+    """The winsound module on Windows, else None (probed once)."""
+    if not _WINSOUND:
+        mod = None
+        if sys.platform.startswith("win"):
+            try:
+                import winsound as mod
+            except Exception:
+                mod = None
+        _WINSOUND.append(mod)
+    return _WINSOUND[0]
 
 # MP3 playback
-try:
-    from playsound import playsound
-except Exception:
-    playsound = None
+_PLAYSOUND: list = []
+
+def _playsound():
+    """playsound.playsound if installed, else None (imported once)."""
+    if not _PLAYSOUND:
+        try:
+            from playsound import playsound
+        except Exception:
+            playsound = None
+        _PLAYSOUND.append(playsound)
+    return _PLAYSOUND[0]
 
 # ======================= Sound helpers =======================
 
 def beep(freq: int = 800, dur_ms: int = 130) -> None:
-    if WINSOUND:
+    winsound = _winsound()
+    if winsound:
         try:
-            WINSOUND.Beep(freq, dur_ms)
+            winsound.Beep(freq, dur_ms)
         except Exception:
             pass
 
 def play_party_music() -> None:
     """Play party.mp3 (blocking in this thread); call via a background thread."""
+    playsound = _playsound()
     if playsound and os.path.exists(PARTY_MUSIC_FILE):
         try:
             playsound(PARTY_MUSIC_FILE)
         except Exception as e:
-            if RICH:
+            if _load_rich():
                 console.print(f"[yellow]Music playback failed: {e}[/yellow]")
             else:
                 print(f"Music playback failed: {e}")
     else:
-        if RICH:
+        if _load_rich():
             console.print("[yellow]party.mp3 not found or playsound not installed[/yellow]")
 
+# ======================= Grid sizes =======================
+
+# Box size n -> N x N grid with N = n * n; cells hold 1..N (0 = empty).
+GRID_BOX_SIZES = (2, 3, 4, 5)
+GRID_SIDES = {n ** 4: n * n for n in GRID_BOX_SIZES}       # cell count -> N
+SYMBOLS = "123456789ABCDEFGHIJKLMNOP"                      # value v is SYMBOLS[v - 1]
+_SYMBOL_VALUE = {ch: v for v, ch in enumerate("0" + SYMBOLS)}
+_SYMBOL_VALUE["."] = 0
+
+def box_size(board: List[List[int]]) -> int:
+    """n for an N x N board (N = n * n)."""
+    n = math.isqrt(len(board))
+    if n not in GRID_BOX_SIZES or n * n != len(board):
+        raise ValueError(f"Unsupported grid size: {len(board)}x{len(board)}")
+    return n
+
+# ======================= Board =======================
+
+# Cell value <-> byte tables for `Board.parse` / `board_to_string`.
+_CELL_SYMBOL = bytes(ord(("0" + SYMBOLS)[v]) if v <= len(SYMBOLS) else ord("?") for v in range(256))
+_SYMBOL_CELL = bytes(_SYMBOL_VALUE.get(chr(b), 0) for b in range(256))
+_NOT_SYMBOL = bytes(b for b in range(256) if chr(b) not in _SYMBOL_VALUE)
+
+class Board:
+    """N x N grid in one flat bytearray (row-major, 0 = empty).
+
+    `board[r]` is a writable memoryview of row r, so `board[r][c]` reads and
+    writes like the list-of-lists grids; `col(c)` is a strided view and
+    `box(b)` the rows of a box, none of them copies. `snapshot()`/`restore()`
+    copy the cells in one go. Boards compare and hash by content, also against
+    list grids; don't change one while it is a dict key.
+
+    `hash()` is O(n) on purpose: one C-level pass over the cells, about
+    0.4 us for 9x9 and 0.6 us for 25x25. Row, column and box views and
+    `cells` itself write straight into the bytearray, so a cached or
+    incrementally kept hash could not see those writes and would go stale.
+    `SolveCache` keys on canonical strings, not Boards, so its lookups do
+    not pay for this.
+    """
+
+    __slots__ = ("cells", "size", "n", "_view")
+
+    def __init__(self, cells=None, size: int = 9):
+        self.cells = bytearray(size * size) if cells is None else bytearray(cells)
+        self.size = size
+        self.n = math.isqrt(size)
+        if self.n not in GRID_BOX_SIZES or self.n * self.n != size or len(self.cells) != size * size:
+            raise ValueError(f"Unsupported grid: {len(self.cells)} cells for {size}x{size}")
+        self._view = memoryview(self.cells)
+
+    @classmethod
+    def from_list(cls, grid: List[List[int]]) -> "Board":
+        return cls(bytes(v for row in grid for v in row), len(grid))
+
+    @classmethod
+    def parse(cls, obj) -> "Board":
+        """A new Board from a Board, a list grid or a string (same formats as `normalize_board`)."""
+        if isinstance(obj, Board):
+            return obj.copy()
+        if isinstance(obj, str):
+            cells = obj.upper().encode("ascii", "ignore").translate(_SYMBOL_CELL, _NOT_SYMBOL)
+            size = GRID_SIDES.get(len(cells))
+            if size and max(cells) <= size:
+                return cls(cells, size)
+            raise ValueError(f"Unexpected puzzle format: {type(obj)}")
+        return cls.from_list(normalize_board(obj))
+
+    def to_list(self) -> List[List[int]]:
+        s = self.size
+        return [list(self.cells[r * s:(r + 1) * s]) for r in range(s)]
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, r: int) -> memoryview:
+        s = self.size
+        if r < 0:
+            r += s
+        if not 0 <= r < s:
+            raise IndexError("row index out of range")
+        return self._view[r * s:(r + 1) * s]
+
+    def __iter__(self):
+        s = self.size
+        for base in range(0, s * s, s):
+            yield self._view[base:base + s]
+
+    row = __getitem__
+
+    def col(self, c: int) -> memoryview:
+        return self._view[c:len(self.cells):self.size]
+
+    def box(self, b: int) -> Tuple[memoryview, ...]:
+        """The n row segments of box b (row-major box order)."""
+        n, s = self.n, self.size
+        base = (b // n) * n * s + (b % n) * n
+        return tuple(self._view[base + k * s:base + k * s + n] for k in range(n))
+
+    def copy(self) -> "Board":
+        return Board(self.cells, self.size)
+
+    def snapshot(self) -> bytes:
+        return bytes(self.cells)
+
+    def restore(self, snapshot: bytes) -> None:
+        self.cells[:] = snapshot
+
+    def filled(self) -> int:
+        return len(self.cells) - self.cells.count(0)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Board):
+            return self.cells == other.cells
+        if isinstance(other, list):
+            try:
+                return len(other) == self.size and self.cells == bytes(v for row in other for v in row)
+            except (TypeError, ValueError):
+                return False
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(bytes(self.cells))        # O(n), see the class docstring
+
+    def __reduce__(self):
+        return Board, (bytes(self.cells), self.size)
+
+    def __repr__(self) -> str:
+        return f"Board({board_to_string(self)!r})"
+
+def as_board(board) -> Board:
+    """`board` itself when it is a Board, else a new Board parsed from it."""
+    return board if isinstance(board, Board) else Board.parse(board)
+
+def _on_board(solve):
+    """Engine adapter: run `solve` on a Board; list grids are converted and filled in place."""
+    @wraps(solve)
+    def engine(board, *args, **kwargs):
+        if isinstance(board, Board):
+            return solve(board, *args, **kwargs)
+        work = Board.from_list(board)
+        try:
+            return solve(work, *args, **kwargs)
+        finally:
+            for r, row in enumerate(board):
+                row[:] = work[r]
+    return engine
+
 # ======================= Render helpers =======================
 
-def render_board(board: List[List[int]], title: str = "Sudoku",
+def render_board(board, title: str = "Sudoku",
                  highlight: Optional[Tuple[int, int]] = None):
-    """Rich table if available; plain text otherwise."""
-    if not RICH:
-        lines = [title, "     " + "  ".join([f"C{c+1}" for c in range(9)])]
-        for r in range(9):
-            if r in (3, 6):
-                lines.append("    " + "-" * 29)
+    """Rich table if available; plain text otherwise (a Board or a list grid)."""
+    board = as_board(board)
+    size, n, values = board.size, board.n, board.cells
+    if not _load_rich():
+        lines = [title, "     " + "  ".join([f"C{c+1}" for c in range(size)])]
+        for r in range(size):
+            if r and r % n == 0:
+                lines.append("    " + "-" * (3 * size + 2))
             row = [f"R{r+1:<2} "]
-            for c in range(9):
-                if c in (3, 6):
+            for c in range(size):
+                if c and c % n == 0:
                     row.append("| ")
-                v = board[r][c]
-                sym = str(v) if v else "."
+                v = values[r * size + c]
+                sym = SYMBOLS[v - 1] if v else "."
                 if highlight == (r, c):
                     sym = f"[{sym}]"
                 row.append(sym + " ")
@@ -156,26 +369,125 @@ def render_board(board: List[List[int]], title: str = "Sudoku",
 
     t = Table(title=f"🧩 {title}", box=box.SQUARE, border_style="cyan", show_lines=True)
     t.add_column("", justify="center", style="dim")
-    for c in range(9):
+    for c in range(size):
         t.add_column(f"C{c+1}", justify="center", style="white", no_wrap=True)
-    for r in range(9):
+    for r in range(size):
         cells = [f"[dim]R{r+1}[/dim]"]
-        for c in range(9):
-            v = board[r][c]
-            txt = str(v) if v else "[dim].[/dim]"
-            color = "white" if ((r // 3) + (c // 3)) % 2 == 0 else "bright_black"
+        for c in range(size):
+            v = values[r * size + c]
+            txt = SYMBOLS[v - 1] if v else "[dim].[/dim]"
+            color = "white" if ((r // n) + (c // n)) % 2 == 0 else "bright_black"
             cell = f"[{color}]{txt}[/{color}]"
             if highlight == (r, c):
-                cell = f"[bold {HIGHLIGHT_COLOR}]{str(v) if v else '·'}[/bold {HIGHLIGHT_COLOR}]"
+                cell = f"[bold {HIGHLIGHT_COLOR}]{SYMBOLS[v - 1] if v else '·'}[/bold {HIGHLIGHT_COLOR}]"
             cells.append(cell)
         t.add_row(*cells)
     return t
 
+class PeekRenderer:
+    """The `render_board` table as a Rich renderable that redraws only changed cells.
+
+    Cells are kept as pre-styled segments and a row is rebuilt only when one of
+    its cells (or the highlight) changed since the last frame. Frames are built
+    when Live refreshes, so output is capped at its refresh rate however often
+    the solver moves. Set `frozen` to keep showing the last frame. It draws the
+    Board it is given (a list grid is copied, so pass the solver's Board).
+    """
+
+    def __init__(self, board: "Board", title: str = "Solving…"):
+        _need_rich("PeekRenderer")
+        self.board = board = as_board(board)
+        self.title = title
+        self.highlight: Optional[Tuple[int, int]] = None
+        self.frozen = False
+        self.frames = 0
+        self.cells_drawn = 0
+        self.render_seconds = 0.0
+        self.size = size = board.size
+        self.box = board.n
+        self._lock = threading.Lock()
+        self._shown = [-1] * (size * size)   # value drawn per cell, + size + 1 when highlighted
+        self._rows: List[Optional[list]] = [None] * size
+        self._last: Optional[list] = None
+
+        # Column text widths as the table sizes them: "R16", "C1" ... "C16".
+        lw = len(f"R{size}")
+        widths = [len(f"C{c + 1}") for c in range(size)]
+        rules = ["─" * (w + 2) for w in [lw] + widths]
+        border = Style.parse("cyan")
+        self._bar = Segment("│", border)
+        self._top = Segment("┌" + "┬".join(rules) + "┐", border)
+        self._mid = Segment("├" + "┼".join(rules) + "┤", border)
+        self._bottom = Segment("└" + "┴".join(rules) + "┘", border)
+        self._title_style = Style.parse("italic")
+        header = Style.parse("bold")
+        self._header = [self._bar, Segment(" " * (lw + 2)), self._bar]
+        for c in range(size):
+            self._header += [Segment(f" {'C' + str(c + 1):^{widths[c]}} ", header), self._bar]
+        self._labels = [Segment(f" {'R' + str(r + 1):^{lw}} ", Style.parse("dim")) for r in range(size)]
+        # Styled text for every (width, shade, value) and the highlight, built once.
+        shades = [Style.parse("white"), Style.parse("bright_black")]
+        dim = Style.parse("dim")
+        hl = Style.parse(f"bold {HIGHLIGHT_COLOR}")
+        cells, hls = {}, {}
+        for w in set(widths):
+            cells[w] = [[Segment(f" {SYMBOLS[v - 1]:^{w}} ", shade) if v
+                         else Segment(f" {'.':^{w}} ", shade + dim)
+                         for v in range(size + 1)] for shade in shades]
+            hls[w] = [Segment(f" {SYMBOLS[v - 1] if v else '·':^{w}} ", hl) for v in range(size + 1)]
+        self._cell = [cells[w] for w in widths]
+        self._hl = [hls[w] for w in widths]
+
+    def _row(self, r: int, values: List[int]) -> list:
+        segs = [self._bar, self._labels[r], self._bar]
+        hl, n = self.size + 1, self.box
+        for c in range(self.size):
+            v = values[c]
+            if v >= hl:
+                segs.append(self._hl[c][v - hl])
+            else:
+                segs.append(self._cell[c][((r // n) + (c // n)) % 2][v])
+            segs.append(self._bar)
+        return segs
+
+    def _frame(self) -> list:
+        cells, shown, rows, size = self.board.cells, self._shown, self._rows, self.size
+        hr, hc = self.highlight or (-1, -1)
+        for r in range(size):
+            base = r * size
+            values = list(cells[base:base + size])
+            if r == hr:
+                values[hc] += size + 1
+            old = shown[base:base + size]
+            if rows[r] is None or values != old:
+                self.cells_drawn += sum(1 for a, b in zip(values, old) if a != b)
+                shown[base:base + size] = values
+                rows[r] = self._row(r, values)
+        nl = Segment.line()
+        title = f"🧩 {self.title}"
+        pad = max(0, (cell_len(self._top.text) - cell_len(title)) // 2)
+        lines = [Segment(" " * pad), Segment(title, self._title_style), nl,
+                 self._top, nl, *self._header, nl]
+        for r in range(size):
+            lines += [self._mid, nl, *rows[r], nl]
+        lines += [self._bottom, nl]
+        self.frames += 1
+        return lines
+
+    def __rich_console__(self, console, options):
+        t0 = time.perf_counter()
+        with self._lock:
+            if self._last is None or not self.frozen:
+                self._last = self._frame()
+            lines = self._last
+        self.render_seconds += time.perf_counter() - t0
+        yield from lines
+
 # ======================= Input / spinner =======================
 
 def ask_for_difficulty() -> str:
     """Interactive difficulty picker (no default auto-selection)."""
-    if RICH and sys.stdin.isatty():
+    if _load_rich() and sys.stdin.isatty():
         console.print(Panel.fit(
             "\n[b]Choose your challenge:[/b]  "
             "[green]easy[/green]  |  [yellow]medium[/yellow]  |  [red]hard[/red]",
@@ -205,61 +517,233 @@ def ask_for_difficulty() -> str:
                 return "hard"
             print("Please type: easy, medium, or hard.")
 
-def loading_dots(label: str = "Fetching puzzle", seconds: float = 1.2) -> None:
-    if seconds <= 0:
+def loading_dots(label: str = "Fetching puzzle", seconds: float = 1.2, until=None) -> None:
+    """Animated wait of at least `seconds`; with a Future in `until`, keep going until it is done."""
+    def waiting(elapsed: float) -> bool:
+        return elapsed < seconds or (until is not None and not until.done())
+
+    if seconds <= 0 and until is None:
         return
     seq = cycle([label, label + ".", label + "..", label + "..."])
-    if RICH:
+    t0 = time.time()
+    if _load_rich():
         with Live(Panel(next(seq), border_style="magenta", title="⏳ Please wait"),
                   refresh_per_second=12, console=console) as live:
-            steps = int(seconds / 0.2)
-            for _ in range(steps):
+            while waiting(time.time() - t0):
                 live.update(Panel(next(seq), border_style="magenta", title="⏳ Please wait"))
                 time.sleep(0.2)
     else:
         print(label, end="", flush=True)
-        for _ in range(int(seconds / 0.2)):
+        while waiting(time.time() - t0):
             print(".", end="", flush=True)
             time.sleep(0.2)
         print()
 
 # ======================= Puzzle I/O =======================
 
+def _cell_value(x) -> int:
+    s = str(x).strip().upper()
+    if s in (".", "0", ""):
+        return 0
+    if s.isdigit():
+        return int(s)
+    return _SYMBOL_VALUE[s]            # KeyError for junk
+
 def normalize_board(obj) -> List[List[int]]:
-    """Accept a 9x9 list or an 81-char string of digits/., and return a 9x9 int grid."""
+    """Accept an NxN list or a string of N*N symbols/., and return an NxN int grid.
+
+    N is 4, 9, 16 or 25; values above 9 are letters (A = 10 ... P = 25).
+    """
+    if isinstance(obj, Board):
+        return obj.to_list()
     if isinstance(obj, list):
-        grid = [[0 if str(x) in (".", "0") else int(x) for x in row] for row in obj]
-        if len(grid) == 9 and all(len(r) == 9 for r in grid):
+        try:
+            grid = [[_cell_value(x) for x in row] for row in obj]
+        except (KeyError, TypeError):
+            grid = []
+        n = len(grid)
+        if n * n in GRID_SIDES and all(len(r) == n and max(r) <= n for r in grid):
             return grid
     if isinstance(obj, str):
-        digits = [(0 if ch in "0." else int(ch)) for ch in obj if ch in "0123456789."]
-        if len(digits) == 81:
-            return [digits[i * 9:(i + 1) * 9] for i in range(9)]
+        values = [_SYMBOL_VALUE[ch] for ch in obj.upper() if ch in _SYMBOL_VALUE]
+        n = GRID_SIDES.get(len(values))
+        if n and max(values) <= n:
+            return [values[i * n:(i + 1) * n] for i in range(n)]
     raise ValueError(f"Unexpected puzzle format: {type(obj)}")
 
-def fetch_puzzle(api_url: str, diff: str, timeout=(5, 20)) -> dict:
+def board_to_string(board) -> str:
+    """Inverse of `normalize_board`: one symbol per cell (digits, then letters), 0 for empty cells."""
+    if isinstance(board, Board):
+        return board.cells.translate(_CELL_SYMBOL).decode("ascii")
+    return "".join(SYMBOLS[v - 1] if v else "0" for row in board for v in row)
+
+def fetch_puzzle(api_url: str, diff: str, timeout=(5, 20), session=None) -> dict:
+    """POST one puzzle request; pass a `requests.Session` to reuse pooled connections."""
     import requests
     headers = {"Content-Type": "application/json", "Accept": "application/json"}
     body = {"difficulty": diff, "solution": True, "array": True}
-    resp = requests.post(api_url, json=body, headers=headers, timeout=timeout)
+    resp = (session or requests).post(api_url, json=body, headers=headers, timeout=timeout)
     resp.raise_for_status()
     return resp.json()
 
-def get_puzzle_and_solution(api_url: str, difficulty: str, force_offline: bool = False):
+class PuzzleCache:
+    """Disk-backed queue of API puzzles per difficulty, topped up in the background.
+
+    `take()` pops a stored puzzle immediately (the consumed entry is evicted
+    from disk) and schedules a top-up; a few daemon threads sharing one pooled
+    `requests.Session` fetches until each difficulty holds `size` entries.
+    Being daemons, they never hold up interpreter exit: a fetch still in
+    flight when the program ends is simply dropped (entries are written
+    atomically, so the cache stays intact).
+    """
+
+    def __init__(self, api_url: str, cache_dir: Optional[str] = None,
+                 size: int = PUZZLE_CACHE_SIZE, workers: int = PREFETCH_WORKERS):
+        self.api_url = api_url
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.size = max(1, size)
+        self.workers = max(1, workers)
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.jobs = None          # queue of difficulties to fetch, started on first top-up
+        self.threads = []
+        self.session = None
+
+    def _path(self, difficulty: str) -> str:
+        return os.path.join(self.cache_dir, f"puzzles-{difficulty}.json")
+
+    def _load(self, difficulty: str) -> list:
+        try:
+            with open(self._path(difficulty), encoding="utf-8") as f:
+                entries = json.load(f)
+            return entries if isinstance(entries, list) else []
+        except (OSError, ValueError):
+            return []
+
+    def _save(self, difficulty: str, entries: list) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = self._path(difficulty) + f".{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+        os.replace(tmp, self._path(difficulty))
+
+    def count(self, difficulty: str) -> int:
+        with self.lock:
+            return len(self._load(difficulty))
+
+    def take(self, difficulty: str) -> Optional[dict]:
+        """Pop the oldest cached puzzle (or None) and top the cache up in the background."""
+        with self.lock:
+            entries = self._load(difficulty)
+            entry = entries.pop(0) if entries else None
+            if entry is not None:
+                self._save(difficulty, entries)
+        self.top_up(difficulty)
+        return entry
+
+    def top_up(self, difficulty: str) -> None:
+        """Schedule enough background fetches to bring `difficulty` back to `size`."""
+        with self.lock:
+            missing = self.size - len(self._load(difficulty)) - self.pending.get(difficulty, 0)
+            if missing <= 0:
+                return
+            if self.jobs is None:
+                import queue
+                import requests
+                self.session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.workers)
+                self.session.mount("http://", adapter)
+                self.session.mount("https://", adapter)
+                self.jobs = queue.Queue()
+                self.threads = [threading.Thread(target=self._prefetch_loop, daemon=True,
+                                                 name=f"puzzle-prefetch-{k}")
+                                for k in range(self.workers)]
+                for t in self.threads:
+                    t.start()
+            self.pending[difficulty] = self.pending.get(difficulty, 0) + missing
+        for _ in range(missing):
+            self.jobs.put(difficulty)
+
+    def _prefetch_loop(self) -> None:
+        while True:
+            difficulty = self.jobs.get()
+            if difficulty is None:
+                return
+            self._prefetch_one(difficulty)
+
+    def _prefetch_one(self, difficulty: str) -> None:
+        try:
+            data = fetch_puzzle(self.api_url, difficulty, timeout=PREFETCH_TIMEOUT, session=self.session)
+            normalize_board(data.get("puzzle"))          # don't cache junk
+            with self.lock:
+                entries = self._load(difficulty)
+                if len(entries) < self.size:
+                    entries.append(data)
+                    self._save(difficulty, entries)
+        except Exception:
+            pass                                         # next take() schedules a retry
+        finally:
+            with self.lock:
+                self.pending[difficulty] -= 1
+
+    def close(self, wait: float = 0.0) -> None:
+        """Stop prefetching: queued fetches are dropped, in-flight ones get up to `wait` seconds."""
+        if self.jobs is None:
+            return
+        import queue
+        while True:                      # drop what hasn't started
+            try:
+                difficulty = self.jobs.get_nowait()
+            except queue.Empty:
+                break
+            if difficulty is not None:
+                with self.lock:
+                    self.pending[difficulty] -= 1
+        for _ in self.threads:
+            self.jobs.put(None)
+        deadline = time.monotonic() + max(0.0, wait)
+        for t in self.threads:
+            t.join(max(0.0, deadline - time.monotonic()))
+        if not any(t.is_alive() for t in self.threads):
+            self.session.close()
+
+def default_cache_dir() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.environ.get("SUDOKU_CACHE_DIR") or os.path.join(base, "sudokusolver")
+
+def offline_puzzle(difficulty: str, bank: Optional[str] = None):
+    """(puzzle, solution, difficulty) from a random pick of the puzzle bank, else the built-in puzzle."""
+    try:
+        with PuzzleBank(bank) as pb:
+            picked = pb.pick(difficulty)
+        if picked is not None:
+            return picked[0], picked[1], difficulty
+    except (OSError, ValueError):
+        pass
+    return Board.parse(FALLBACK_PUZZLE), Board.parse(FALLBACK_SOLUTION), difficulty
+
+def get_puzzle_and_solution(api_url: str, difficulty: str, force_offline: bool = False,
+                            source: str = "api", cache: Optional[PuzzleCache] = None,
+                            bank: Optional[str] = None):
+    """(puzzle, solution or None, difficulty) as Boards, from the API, the generator or offline."""
     if force_offline:
-        return normalize_board(FALLBACK_PUZZLE), normalize_board(FALLBACK_SOLUTION), difficulty
+        return offline_puzzle(difficulty, bank)
+    if source == "generator":
+        return generate_puzzle(difficulty)
     try:
-        data = fetch_puzzle(api_url, difficulty)
-        board = normalize_board(data.get("puzzle"))
+        data = cache.take(difficulty) if cache else None
+        if data is None:
+            data = fetch_puzzle(api_url, difficulty, session=cache.session if cache else None)
+        board = Board.parse(data.get("puzzle"))
         sol = data.get("solution")
-        solution = normalize_board(sol) if sol else None
+        solution = Board.parse(sol) if sol else None
         return board, solution, data.get("difficulty", difficulty)
     except Exception as e:
-        if RICH:
+        if _load_rich():
             console.print(f"[yellow]API failed ({e}). Using offline fallback.[/yellow]")
         else:
             print(f"API failed ({e}). Using offline fallback.")
-        return normalize_board(FALLBACK_PUZZLE), normalize_board(FALLBACK_SOLUTION), difficulty
+        return offline_puzzle(difficulty, bank)
 
 # ======================= Big 5→1 Countdown =======================
 
@@ -275,7 +759,7 @@ PHRASES = {5: "Ready?", 4: "Here we go…", 3: "Brace yourself…", 2: "Focus…
 def countdown(skip: bool = False) -> None:
     if skip:
         return
-    if RICH:
+    if _load_rich():
         console.print(Panel.fit("Get ready…", border_style="magenta", title="🎬"))
         time.sleep(0.7)
         for n in range(COUNTDOWN_SECONDS, 0, -1):
@@ -299,27 +783,575 @@ def countdown(skip: bool = False) -> None:
 
 # ======================= Solver (MRV) =======================
 
-def solve_with_mrv(board: List[List[int]],
+# 9-bit masks: bit (n - 1) set <=> digit n is used in that row/column/box.
+ALL_DIGITS = 0x1FF
+DIGIT_BIT  = [0] + [1 << (n - 1) for n in range(1, 10)]
+BIT_DIGIT  = [0] * (ALL_DIGITS + 1)          # lowest set bit -> digit
+for _n in range(1, 10):
+    BIT_DIGIT[1 << (_n - 1)] = _n
+POPCOUNT   = [bin(_m).count("1") for _m in range(ALL_DIGITS + 1)]
+MASK_DIGITS = [tuple(n for n in range(1, 10) if _m & DIGIT_BIT[n]) for _m in range(ALL_DIGITS + 1)]
+
+# Flat cell index (0..80, row-major) -> row / column / box
+CELL_ROW = [i // 9 for i in range(81)]
+CELL_COL = [i % 9 for i in range(81)]
+CELL_BOX = [(i // 27) * 3 + (i % 9) // 3 for i in range(81)]
+
+# Cell indices of each row / column / box
+ROW_UNITS = [[r * 9 + c for c in range(9)] for r in range(9)]
+COL_UNITS = [[r * 9 + c for r in range(9)] for c in range(9)]
+BOX_UNITS = [[i for i in range(81) if CELL_BOX[i] == b] for b in range(9)]
+
+# The 20 cells sharing a row, column or box with each cell; one bit per cell
+PEERS = [sorted(set(ROW_UNITS[CELL_ROW[i]] + COL_UNITS[CELL_COL[i]] + BOX_UNITS[CELL_BOX[i]]) - {i})
+         for i in range(81)]
+CELL_BIT = [1 << i for i in range(81)]
+
+
+class _QuickPeek:
+    """Live view of the first `peek_seconds` of a solve (Rich only).
+
+    The solver only moves the highlight; `PeekRenderer` draws the board at the
+    Live refresh rate and is frozen once the window is over.
+    """
+
+    def __init__(self, board: Board, peek_seconds: float):
+        self.board = board
+        self.peek_seconds = peek_seconds
+        self.start_time = time.time()
+        self.steps = 0
+        self.current: Optional[Tuple[int, int]] = None
+        self.view = PeekRenderer(board)
+        self.live = None
+
+    @property
+    def render_seconds(self) -> float:
+        return self.view.render_seconds
+
+    def render(self, title: str, highlight: Optional[Tuple[int, int]]) -> None:
+        self.view.title, self.view.highlight = title, highlight
+
+    def update(self) -> None:
+        if self.view.frozen: return
+        if (time.time() - self.start_time) > self.peek_seconds:
+            self.view.frozen = True
+            return
+        self.steps += 1
+        self.view.highlight = self.current
+
+    def solved(self) -> None:
+        if (time.time() - self.start_time) <= self.peek_seconds:
+            self.render("Solved!", None)
+            self.view.frozen = False
+            self.live.refresh()
+            time.sleep(ANIM_DELAY)
+
+
+def _run_with_peek(board: Board, peek_seconds: float, instant: bool, search,
+                   stats: Optional[SolveStats] = None) -> Optional[bool]:
+    """Call `search(peek)` inside a Live view when the quick peek is on, else `search(None)`.
+
+    Fills `stats.solve_seconds` and `stats.render_seconds` when given. When
+    a `SolveBudget` stops the search, the board is put back as it was and
+    the result is None.
+    """
+    t0 = time.perf_counter()
+    start = board.snapshot()
+    peek = None
+    try:
+        if (not instant) and peek_seconds > 0.0 and _load_rich():
+            peek = _QuickPeek(board, peek_seconds)
+            with Live(peek.view, console=console, refresh_per_second=PEEK_REFRESH_PER_SECOND) as live:
+                peek.live = live
+                ok = search(peek)
+        else:
+            ok = search(None)
+    except _BudgetExceeded:
+        board.restore(start)
+        ok = None
+    if stats is not None:
+        if peek is not None:
+            stats.render_seconds = peek.render_seconds
+        stats.solve_seconds = time.perf_counter() - t0
+    return ok
+
+
+def _clocked(fn, acc: List[float]):
+    """Wrap fn so the time spent in it is added to acc[0] (used for `timed=True` solves)."""
+    perf = time.perf_counter
+
+    def clocked(*args):
+        t0 = perf()
+        try:
+            return fn(*args)
+        finally:
+            acc[0] += perf() - t0
+    return clocked
+
+
+@dataclass
+class SolveStats:
+    """Search counters for one solve (all engines fill what applies to them)."""
+    propagated: int = 0   # cells in the final grid filled by naked/hidden singles
+    searched: int = 0     # cells in the final grid filled by a branching guess
+    guesses: int = 0      # branching placements tried, including the undone ones
+    nodes: int = 0        # search nodes (cell selections) visited
+    backtracks: int = 0   # branching placements undone
+    max_depth: int = 0    # deepest branching level reached
+    candidate_seconds: float = 0.0   # candidate upkeep / cell selection (`timed=True` only)
+    render_seconds: float = 0.0      # quick-peek rendering
+    solve_seconds: float = 0.0       # whole solve call, wall clock
+
+
+@dataclass
+class SolveResult:
+    """What the solver engines return: truthy when the board was solved.
+
+    `stopped` says why a `SolveBudget` ended the search early ("timeout",
+    "nodes" or "cancelled"); the board is then left as it was given and
+    `stats` holds the progress so far.
+    """
+    solved: bool
+    stats: SolveStats
+    stopped: Optional[str] = None
+
+    def __bool__(self) -> bool:
+        return self.solved
+
+    @property
+    def timed_out(self) -> bool:
+        return self.stopped is not None
+
+
+class CancelToken:
+    """Cooperative stop flag: `cancel()` from any thread; engines see it at their next budget poll."""
+
+    __slots__ = ("cancelled",)
+
+    def __init__(self):
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+class _BudgetExceeded(Exception):
+    """Raised by `SolveBudget.poll` to unwind a search (caught in `_run_with_peek`)."""
+
+
+_NEVER = 1 << 62     # node count that is never reached: polling off
+
+
+class SolveBudget:
+    """Limits for one solve: wall-clock `timeout`, search-node budget and/or a CancelToken.
+
+    Engines keep the node count at which to call `poll()` next, so the
+    check is one int comparison per node; `poll` looks at the token, the
+    node budget and the clock, and raises once any of them ran out (the
+    reason is kept in `reason`). Make a new budget per solve; a token can
+    be shared.
+    """
+
+    __slots__ = ("deadline", "max_nodes", "cancel", "reason")
+
+    def __init__(self, timeout: Optional[float] = None, max_nodes: Optional[int] = None,
+                 cancel: Optional[CancelToken] = None):
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self.max_nodes = max_nodes
+        self.cancel = cancel
+        self.reason: Optional[str] = None
+
+    def poll(self, nodes: int) -> int:
+        """Raise `_BudgetExceeded` if the search must stop, else return the node count for the next poll."""
+        if self.cancel is not None and self.cancel.cancelled:
+            self.reason = "cancelled"
+        elif self.max_nodes is not None and nodes > self.max_nodes:
+            self.reason = "nodes"
+        elif self.deadline is not None and time.monotonic() >= self.deadline:
+            self.reason = "timeout"
+        else:
+            nxt = nodes + BUDGET_POLL_NODES
+            return nxt if self.max_nodes is None else min(nxt, self.max_nodes + 1)
+        raise _BudgetExceeded(self.reason)
+
+
+def _stop_reason(ok: Optional[bool], budget: Optional[SolveBudget]) -> Optional[str]:
+    """`SolveResult.stopped` for an engine run that returned `ok` (None = stopped)."""
+    return None if ok or budget is None else budget.reason
+
+
+class SolveTrace:
+    """Compact record of a solve: the starting grid plus one 16-bit entry per board change.
+
+    Entry = cell << 5 | digit << 1 | placed. Engines append at full speed;
+    `replay_trace` plays it back at any pace, now or after `save`/`load`.
+    """
+
+    MAGIC = b"SDKTRC1\n"
+
+    def __init__(self, start: str = "0" * 81):
+        self.start = start
+        self.steps = array("H")
+
+    def begin(self, board: Board) -> None:
+        self.start = board_to_string(board)
+        del self.steps[:]
+
+    def append(self, i: int, digit: int, placed: bool) -> None:
+        self.steps.append(i << 5 | digit << 1 | placed)
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    def __iter__(self):
+        for e in self.steps:
+            yield e >> 5, (e >> 1) & 15, e & 1
+
+    def apply(self, board: Board, start: int, stop: int) -> int:
+        """Replay steps[start:stop] onto `board`; returns the last cell touched (-1 if none)."""
+        i = -1
+        cells = board.cells
+        for e in self.steps[start:stop]:
+            i = e >> 5
+            cells[i] = (e >> 1) & 15 if e & 1 else 0
+        return i
+
+    def board_at(self, n: int) -> Board:
+        """The grid after the first `n` steps."""
+        board = Board.parse(self.start)
+        self.apply(board, 0, n)
+        return board
+
+    def save(self, path: str) -> None:
+        steps = array("H", self.steps)
+        if sys.byteorder != "little":
+            steps.byteswap()
+        tmp = path + f".{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(self.MAGIC + self.start.encode("ascii") + struct.pack("<I", len(steps)))
+            f.write(steps.tobytes())
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "SolveTrace":
+        with open(path, "rb") as f:
+            data = f.read()
+        head = len(cls.MAGIC) + 81 + 4
+        if len(data) < head or not data.startswith(cls.MAGIC):
+            raise ValueError(f"{path}: not a solve trace")
+        (count,) = struct.unpack_from("<I", data, head - 4)
+        if len(data) != head + 2 * count:
+            raise ValueError(f"{path}: truncated solve trace")
+        trace = cls(data[len(cls.MAGIC):head - 4].decode("ascii"))
+        trace.steps.frombytes(data[head:])
+        if sys.byteorder != "little":
+            trace.steps.byteswap()
+        return trace
+
+
+class _BitCount:
+    """`popcount[mask]` for masks too wide to tabulate."""
+
+    __slots__ = ()
+    __getitem__ = staticmethod(getattr(int, "bit_count", None) or (lambda m: bin(m).count("1")))
+
+
+class _Geometry:
+    """Cell / unit / peer tables for box size n."""
+
+    def __init__(self, n: int):
+        size = n * n
+        cells = size * size
+        self.n, self.size, self.cells = n, size, cells
+        self.all_digits = (1 << size) - 1
+        self.cell_row = [i // size for i in range(cells)]
+        self.cell_col = [i % size for i in range(cells)]
+        self.cell_box = [(i // (size * n)) * n + (i % size) // n for i in range(cells)]
+        rows = [[r * size + c for c in range(size)] for r in range(size)]
+        cols = [[r * size + c for r in range(size)] for c in range(size)]
+        boxes = [[i for i in range(cells) if self.cell_box[i] == b] for b in range(size)]
+        self.units = rows + cols + boxes           # unit u: rows, then columns, then boxes
+        self.cell_units = [(self.cell_row[i], size + self.cell_col[i], 2 * size + self.cell_box[i])
+                           for i in range(cells)]
+        self.peers = [tuple(sorted(set(rows[self.cell_row[i]] + cols[self.cell_col[i]]
+                                       + boxes[self.cell_box[i]]) - {i}))
+                      for i in range(cells)]
+        self.cell_bit = [1 << i for i in range(cells)]
+        # Candidate counts (popcount[mask]) by table up to 16x16; wider masks count bits on the fly.
+        self.popcount = (POPCOUNT if size == 9 else
+                         [bin(m).count("1") for m in range(1 << size)] if size <= 16 else _BitCount())
+
+_GEOMETRIES = {}
+
+def grid_geometry(n: int) -> _Geometry:
+    g = _GEOMETRIES.get(n)
+    if g is None:
+        g = _GEOMETRIES[n] = _Geometry(n)
+    return g
+
+
+class _MaskGrid:
+    """Search state for one board of any size: unit masks, cell candidates and count buckets.
+
+    Candidate masks are kept per cell and updated on place/unplace for the
+    peers only; empty cells sit in per-count buckets (one bit per cell), so
+    the most constrained cell is the lowest bit of the first non-empty
+    bucket. Tables come from `grid_geometry` (the module-level ones for 9x9).
+    `valid` is False when the givens already clash. Placements are written to
+    the Board's cells (a list grid is copied first).
+    """
+
+    def __init__(self, board: Board):
+        self.board = board = as_board(board)
+        self.cells = cells = board.cells
+        self.geo = geo = grid_geometry(board.n)
+        self.cell_row, self.cell_col = geo.cell_row, geo.cell_col
+        self.cell_units, self.peers, self.cell_bit = geo.cell_units, geo.peers, geo.cell_bit
+        self.pop = pop = geo.popcount
+        self.used = used = [0] * (3 * geo.size)      # rows, then columns, then boxes
+        self.valid = True
+        for i in range(geo.cells):
+            v = cells[i]
+            if v:
+                bit = 1 << (v - 1)
+                r, c, b = geo.cell_units[i]
+                if (used[r] | used[c] | used[b]) & bit:
+                    self.valid = False
+                used[r] |= bit; used[c] |= bit; used[b] |= bit
+        self.cand = cand = [0] * geo.cells           # 0 for filled cells
+        self.buckets = buckets = [0] * (geo.size + 1)    # candidate count -> bitboard of cells
+        for i in range(geo.cells):
+            if not cells[i]:
+                r, c, b = geo.cell_units[i]
+                free = ~(used[r] | used[c] | used[b]) & geo.all_digits
+                cand[i] = free
+                buckets[pop[free]] |= geo.cell_bit[i]
+
+    def take(self, i: int) -> int:
+        """Pull empty cell i out of the buckets before filling it; returns its mask."""
+        free = self.cand[i]
+        self.buckets[self.pop[free]] ^= self.cell_bit[i]
+        self.cand[i] = 0
+        return free
+
+    def give_back(self, i: int, free: int) -> None:
+        self.cand[i] = free
+        self.buckets[self.pop[free]] |= self.cell_bit[i]
+
+    def place(self, i: int, bit: int) -> list:
+        """Fill taken cell i; returns the peers that lost `bit` (needed by unplace)."""
+        self.cells[i] = bit.bit_length()
+        used = self.used
+        r, c, b = self.cell_units[i]
+        used[r] |= bit; used[c] |= bit; used[b] |= bit
+        cand, buckets, pop, cell_bit = self.cand, self.buckets, self.pop, self.cell_bit
+        removed = []
+        for p in self.peers[i]:
+            m = cand[p]
+            if m & bit:
+                k = pop[m]
+                pb = cell_bit[p]
+                buckets[k] ^= pb
+                buckets[k - 1] |= pb
+                cand[p] = m ^ bit
+                removed.append(p)
+        return removed
+
+    def unplace(self, i: int, bit: int, removed: list) -> None:
+        self.cells[i] = 0
+        used = self.used
+        r, c, b = self.cell_units[i]
+        used[r] ^= bit; used[c] ^= bit; used[b] ^= bit
+        cand, buckets, pop, cell_bit = self.cand, self.buckets, self.pop, self.cell_bit
+        for p in removed:
+            m = cand[p]
+            k = pop[m]
+            pb = cell_bit[p]
+            buckets[k] ^= pb
+            buckets[k + 1] |= pb
+            cand[p] = m | bit
+
+    def fill_singles(self, trail: list) -> bool:
+        """Fill naked/hidden singles until none are left, appending placements to `trail`.
+
+        Returns False on a contradiction (the caller undoes `trail`).
+        """
+        cand, buckets, used = self.cand, self.buckets, self.used
+        all_digits = self.geo.all_digits
+        while True:
+            if buckets[0]:
+                return False
+            ones = buckets[1]
+            if ones:
+                i = (ones & -ones).bit_length() - 1
+                free = self.take(i)
+                trail.append((i, free, free, self.place(i, free)))
+                continue
+            # Hidden singles: digits that fit in exactly one cell of a unit.
+            placed = False
+            for u, cells in enumerate(self.geo.units):
+                once = twice = 0
+                for i in cells:
+                    m = cand[i]
+                    twice |= once & m
+                    once |= m
+                if (once | used[u]) != all_digits:
+                    return False
+                hidden = once & ~twice
+                while hidden:
+                    bit = hidden & -hidden
+                    hidden ^= bit
+                    for i in cells:
+                        if cand[i] & bit:
+                            free = self.take(i)
+                            trail.append((i, bit, free, self.place(i, bit)))
+                            placed = True
+                            break
+                    else:
+                        return False
+            if not placed:
+                return True
+
+    def undo(self, trail: list) -> None:
+        while trail:
+            i, bit, free, removed = trail.pop()
+            self.unplace(i, bit, removed)
+            self.give_back(i, free)
+
+    def pick(self) -> int:
+        """Most constrained empty cell (lowest index on ties); -1 when the grid is full."""
+        for cells in self.buckets:
+            if cells:
+                return (cells & -cells).bit_length() - 1
+        return -1
+
+
+class _TracedGrid(_MaskGrid):
+    """`_MaskGrid` that logs every placement and removal (singles included) to a SolveTrace."""
+
+    def __init__(self, board: Board, trace: SolveTrace):
+        if len(board) != 9:
+            raise ValueError("Solve traces only cover 9x9 grids")
+        trace.begin(board)
+        super().__init__(board)
+        self.trace = trace
+
+    def place(self, i: int, bit: int) -> list:
+        self.trace.append(i, BIT_DIGIT[bit], True)
+        return super().place(i, bit)
+
+    def unplace(self, i: int, bit: int, removed: list) -> None:
+        self.trace.append(i, BIT_DIGIT[bit], False)
+        super().unplace(i, bit, removed)
+
+
+@_on_board
+def solve_with_mrv(board: Board,
                    peek_seconds: float = DEFAULT_PEEK_SECONDS,
-                   instant: bool = False) -> bool:
-    """Backtracking solver with MRV and O(1) constraint sets + quick peek animation."""
+                   instant: bool = False,
+                   propagate: bool = True,
+                   stats: Optional[SolveStats] = None,
+                   timed: bool = False,
+                   trace: Optional[SolveTrace] = None,
+                   budget: Optional[SolveBudget] = None) -> SolveResult:
+    """Backtracking solver with MRV over 9-bit row/col/box masks + quick peek animation.
+
+    Cell selection is incremental (see `_MaskGrid`). With `propagate`, naked
+    and hidden singles are filled to a fixpoint before the search and after
+    every placement (and undone on backtrack). Without it, the first
+    most-constrained cell in row-major order is branched on with digits in
+    ascending order, so it finds exactly the same solution as `solve_with_sets`.
+
+    Counters go into `stats` (a fresh SolveStats if None), which is also on the
+    returned result. `timed=True` swaps in clocked versions of the grid
+    operations to fill `candidate_seconds`; the default path has no timing.
+    Every board change is appended to `trace` when one is given. A `budget`
+    (timeout / node budget / CancelToken) stops the search early with
+    `result.stopped` set. Any grid size works (see `grid_geometry`); traces
+    cover 9x9 only. Like every engine, it solves a Board in place; list grids
+    are converted and filled in place too.
+    """
+    stats = stats if stats is not None else SolveStats()
+    g = _MaskGrid(board) if trace is None else _TracedGrid(board, trace)
+    if not g.valid:
+        return SolveResult(False, stats)
+    ops = (g.take, g.give_back, g.place, g.unplace, g.fill_singles, g.undo, g.pick)
+    clock = [0.0]
+    if timed:
+        ops = tuple(_clocked(op, clock) for op in ops)
+    take, give_back, place, unplace, fill_singles, undo, pick = ops
+    buckets, cell_row, cell_col = g.buckets, g.cell_row, g.cell_col
+    counts = [0, 0, 0, 0, 0, 0]   # propagated, searched, guesses, nodes, backtracks, max depth
+    poll = [_NEVER if budget is None else 1]   # node count of the next budget check
+
+    def _solve(peek, depth):
+        counts[3] += 1
+        if counts[3] >= poll[0]:
+            poll[0] = budget.poll(counts[3])
+        if depth > counts[5]:
+            counts[5] = depth
+        if propagate:
+            trail = []
+            ok = fill_singles(trail)
+            if not ok:
+                undo(trail)
+                return False
+            counts[0] += len(trail)
+            if trail and peek: peek.update()
+        elif buckets[0]:
+            return False
+        i = pick()
+        if i < 0:
+            if peek: peek.solved()
+            return True
+        if peek: peek.current = (cell_row[i], cell_col[i])
+        free = todo = take(i)
+        while todo:
+            bit = todo & -todo
+            todo ^= bit
+            removed = place(i, bit)
+            counts[1] += 1; counts[2] += 1
+            if peek: peek.update()
+            if _solve(peek, depth + 1): return True
+            unplace(i, bit, removed)
+            counts[1] -= 1; counts[4] += 1
+            if peek: peek.update()
+        give_back(i, free)
+        if propagate:
+            counts[0] -= len(trail)
+            undo(trail)
+        return False
+
+    ok = _run_with_peek(board, peek_seconds, instant, lambda peek: _solve(peek, 0), stats)
+    (stats.propagated, stats.searched, stats.guesses,
+     stats.nodes, stats.backtracks, stats.max_depth) = counts
+    stats.candidate_seconds = clock[0]
+    return SolveResult(bool(ok), stats, _stop_reason(ok, budget))
+
+
+@_on_board
+def solve_with_sets(board: Board,
+                    peek_seconds: float = DEFAULT_PEEK_SECONDS,
+                    instant: bool = False,
+                    stats: Optional[SolveStats] = None) -> SolveResult:
+    """Reference set-based MRV solver (the original engine); kept for benchmarks.
+
+    Fills the node / guess / backtrack counters of `stats` only.
+    """
+    stats = stats if stats is not None else SolveStats()
+    counts = [0, 0, 0]   # nodes, guesses, backtracks
     row_used = [set() for _ in range(9)]
     col_used = [set() for _ in range(9)]
     box_used = [set() for _ in range(9)]
+    cells = board.cells
     for r in range(9):
         for c in range(9):
-            v = board[r][c]
+            v = cells[r * 9 + c]
             if v:
                 row_used[r].add(v)
                 col_used[c].add(v)
                 box_used[(r // 3) * 3 + (c // 3)].add(v)
 
-    start_time = time.time()
-    show_animation = bool(RICH and (not instant) and peek_seconds > 0.0)
-    steps = 0
-    current = None
-    last_update = 0.0
-
     def candidates(r: int, c: int):
         used = row_used[r] | col_used[c] | box_used[(r // 3) * 3 + (c // 3)]
         return [n for n in range(1, 10) if n not in used]  # deterministic
@@ -330,7 +1362,7 @@ def solve_with_mrv(board: List[List[int]],
         best_len = 10
         for rr in range(9):
             for cc in range(9):
-                if board[rr][cc] == 0:
+                if cells[rr * 9 + cc] == 0:
                     cs = candidates(rr, cc)
                     l = len(cs)
                     if l < best_len:
@@ -340,113 +1372,1655 @@ def solve_with_mrv(board: List[List[int]],
         return best, best_cands
 
     def place(r, c, n):
-        board[r][c] = n
+        cells[r * 9 + c] = n
         row_used[r].add(n); col_used[c].add(n); box_used[(r//3)*3 + (c//3)].add(n)
 
     def unplace(r, c, n):
-        board[r][c] = 0
+        cells[r * 9 + c] = 0
         row_used[r].discard(n); col_used[c].discard(n); box_used[(r//3)*3 + (c//3)].discard(n)
 
-    def maybe_update(live):
-        nonlocal steps, last_update
-        if not show_animation: return
-        if (time.time() - start_time) > peek_seconds: return
-        steps += 1
-        if steps % ANIM_EVERY_STEPS == 0:
-            now = time.time()
-            if now - last_update >= ANIM_DELAY:
-                live.update(render_board(board, title="Solving…", highlight=current))
-                last_update = now
-
-    def _solve(live=None):
-        nonlocal current
+    def _solve(peek):
+        counts[0] += 1
         pos, cands = find_mrv()
         if pos is None:
-            if live and show_animation and (time.time() - start_time) <= peek_seconds:
-                live.update(render_board(board, title="Solved!", highlight=None))
-                time.sleep(ANIM_DELAY)
+            if peek: peek.solved()
             return True
         r, c = pos
-        current = (r, c)
+        if peek: peek.current = (r, c)
         for n in (cands or []):
             place(r, c, n)
-            if live: maybe_update(live)
-            if _solve(live): return True
+            counts[1] += 1
+            if peek: peek.update()
+            if _solve(peek): return True
             unplace(r, c, n)
-            if live: maybe_update(live)
+            counts[2] += 1
+            if peek: peek.update()
         return False
 
-    if RICH and show_animation:
-        with Live(render_board(board, title="Solving…"), console=console, refresh_per_second=30) as live:
-            return _solve(live)
+    ok = _run_with_peek(board, peek_seconds, instant, _solve, stats)
+    stats.nodes, stats.guesses, stats.backtracks = counts
+    return SolveResult(bool(ok), stats)
+
+# ======================= Solver (explicit stack) =======================
+
+class StepSolver:
+    """Iterative MRV backtracking (with singles) driven from a preallocated stack.
+
+    No recursion and no per-step callbacks: `step(n)` advances the search by
+    at most n placements/backtracks and returns True (solved), False (no
+    solution) or None (paused; call again). `self.board` is updated in place
+    (a list grid is copied into a Board first), so a caller can render it
+    between calls. Counters accumulate in `stats`;
+    `timed=True` also fills `stats.candidate_seconds`.
+    """
+
+    def __init__(self, board: Board, propagate: bool = True,
+                 stats: Optional[SolveStats] = None, timed: bool = False,
+                 trace: Optional[SolveTrace] = None):
+        self.board = board = as_board(board)
+        self.grid = g = _MaskGrid(board) if trace is None else _TracedGrid(board, trace)
+        self.propagate = propagate
+        self.clock = [0.0]
+        self.ops = (g.take, g.give_back, g.place, g.unplace, g.fill_singles, g.undo, g.pick)
+        if timed:
+            self.ops = tuple(_clocked(op, self.clock) for op in self.ops)
+        size = 1 + board.cells.count(0)
+        self.cells = [0] * size       # branching cell per depth
+        self.free = [0] * size        # its full candidate mask
+        self.todo = [0] * size        # candidates not tried yet
+        self.bits = [0] * size        # digit bit placed right now (0 = none)
+        self.removed = [None] * size  # peers that lost that bit
+        self.trails = [None] * size   # singles filled on entering the depth
+        self.depth = 0
+        self.descend = True
+        self.result: Optional[bool] = None if self.grid.valid else False
+        self.current: Optional[Tuple[int, int]] = None
+        self.stats = stats if stats is not None else SolveStats()
+
+    def step(self, n: int = 1) -> Optional[bool]:
+        if self.result is not None:
+            return self.result
+        take, give_back, place, unplace, fill_singles, undo, pick = self.ops
+        buckets = self.grid.buckets
+        cells, free, todo, bits = self.cells, self.free, self.todo, self.bits
+        removed, trails = self.removed, self.trails
+        propagate = self.propagate
+        st = self.stats
+        d = self.depth
+        descend = self.descend
+        result = None
+
+        while n > 0:
+            n -= 1
+            if descend:
+                st.nodes += 1
+                trail = []
+                if propagate:
+                    if not fill_singles(trail):
+                        undo(trail)
+                        descend = False
+                        d -= 1
+                        if d < 0:
+                            result = False
+                            break
+                        continue
+                    st.propagated += len(trail)
+                elif buckets[0]:
+                    descend = False
+                    d -= 1
+                    if d < 0:
+                        result = False
+                        break
+                    continue
+                trails[d] = trail
+                i = pick()
+                if i < 0:
+                    result = True
+                    break
+                cells[d] = i
+                free[d] = todo[d] = take(i)
+                bits[d] = 0
+                descend = False
+                continue
+
+            # Try the next candidate of the cell at depth d, or backtrack.
+            i = cells[d]
+            if bits[d]:
+                unplace(i, bits[d], removed[d])
+                bits[d] = 0
+                st.searched -= 1
+                st.backtracks += 1
+            t = todo[d]
+            if t:
+                bit = t & -t
+                todo[d] = t ^ bit
+                bits[d] = bit
+                removed[d] = place(i, bit)
+                st.searched += 1
+                st.guesses += 1
+                self.current = (self.grid.cell_row[i], self.grid.cell_col[i])
+                d += 1
+                if d > st.max_depth:
+                    st.max_depth = d
+                descend = True
+            else:
+                give_back(i, free[d])
+                st.propagated -= len(trails[d])
+                undo(trails[d])
+                d -= 1
+                if d < 0:
+                    result = False
+                    break
+
+        self.depth = d
+        self.descend = descend
+        self.result = result
+        st.candidate_seconds = self.clock[0]
+        return result
+
+    def run(self, budget: Optional[SolveBudget] = None) -> bool:
+        """Step until the search finishes; `budget.poll` runs between step batches."""
+        if budget is None:
+            while self.step(1 << 16) is None:
+                pass
+        else:
+            st = self.stats
+            nxt = budget.poll(st.nodes)
+            while self.step(max(1, nxt - st.nodes)) is None:     # a step visits at most one node
+                if st.nodes >= nxt:
+                    nxt = budget.poll(st.nodes)
+        return bool(self.result)
+
+    def next_solution(self, budget: Optional[SolveBudget] = None) -> bool:
+        """Backtrack out of the solution just found and run on to the next one."""
+        if self.result is True:
+            d = self.depth
+            self.stats.propagated -= len(self.trails[d])
+            self.grid.undo(self.trails[d])
+            self.depth = d - 1
+            self.descend = False
+            self.result = None if d > 0 else False
+        return self.run(budget)
+
+
+@_on_board
+def solve_with_stack(board: Board,
+                     peek_seconds: float = DEFAULT_PEEK_SECONDS,
+                     instant: bool = False,
+                     stats: Optional[SolveStats] = None,
+                     timed: bool = False,
+                     trace: Optional[SolveTrace] = None,
+                     budget: Optional[SolveBudget] = None) -> SolveResult:
+    """`StepSolver` behind the `solve_with_mrv` contract; the peek renders between step batches."""
+    if len(board) != 9:
+        return solve_with_bitset(board, peek_seconds, instant, stats=stats, timed=timed, trace=trace,
+                                 budget=budget)
+    stats = stats if stats is not None else SolveStats()
+    solver = StepSolver(board, stats=stats, timed=timed, trace=trace)
+
+    def _solve(peek):
+        if peek is None:
+            return solver.run(budget)
+        result = None
+        while result is None and (time.time() - peek.start_time) <= peek.peek_seconds:
+            result = solver.step(STACK_STEPS_PER_FRAME)
+            if budget is not None and result is None:
+                budget.poll(stats.nodes)
+            peek.render("Solving…", solver.current)
+            time.sleep(ANIM_DELAY)
+        if result is None:
+            peek.view.frozen = True
+            result = solver.run(budget)
+        if result:
+            peek.solved()
+        return result
+
+    ok = _run_with_peek(board, peek_seconds, instant, _solve, stats)
+    return SolveResult(bool(ok), stats, _stop_reason(ok, budget))
+
+# ======================= Solver (Dancing Links) =======================
+
+# Exact cover: 729 rows (cell, digit) x 324 columns, in four blocks of 81:
+# cell filled, row has digit, column has digit, box has digit.
+DLX_COLUMNS = 324
+
+class _CoverMatrix:
+    """Toroidal doubly-linked Sudoku cover matrix (Knuth's Algorithm X / DLX).
+
+    Node 0 is the root, nodes 1..324 the column headers, then 4 nodes per row.
+    Every cover is undone in reverse order after a solve, so one instance is
+    built per process and reused for every puzzle.
+    """
+
+    def __init__(self):
+        n_nodes = 1 + DLX_COLUMNS + 729 * 4
+        self.L = L = [0] * n_nodes
+        self.R = R = [0] * n_nodes
+        self.U = U = list(range(n_nodes))
+        self.D = D = list(range(n_nodes))
+        self.C = C = [0] * n_nodes
+        self.S = S = [0] * (DLX_COLUMNS + 1)
+        self.node_row = [0] * n_nodes          # node -> row id (r * 81 + c * 9 + n - 1)
+        self.row_node = [0] * 729              # row id -> its first node
+
+        for h in range(DLX_COLUMNS + 1):
+            L[h] = h - 1 if h else DLX_COLUMNS
+            R[h] = h + 1 if h < DLX_COLUMNS else 0
+
+        node = DLX_COLUMNS + 1
+        for r in range(9):
+            for c in range(9):
+                b = (r // 3) * 3 + c // 3
+                for n in range(1, 10):
+                    rid = r * 81 + c * 9 + n - 1
+                    cols = (1 + r * 9 + c, 82 + r * 9 + n - 1,
+                            163 + c * 9 + n - 1, 244 + b * 9 + n - 1)
+                    first = node
+                    self.row_node[rid] = first
+                    for k, col in enumerate(cols):
+                        C[node] = col
+                        self.node_row[node] = rid
+                        L[node] = node - 1 if k else first + 3
+                        R[node] = node + 1 if k < 3 else first
+                        U[node] = U[col]; D[node] = col
+                        D[U[col]] = node; U[col] = node
+                        S[col] += 1
+                        node += 1
+        self.lock = threading.Lock()
+
+    def cover(self, col: int) -> None:
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        R[L[col]] = R[col]; L[R[col]] = L[col]
+        i = D[col]
+        while i != col:
+            j = R[i]
+            while j != i:
+                D[U[j]] = D[j]; U[D[j]] = U[j]
+                S[C[j]] -= 1
+                j = R[j]
+            i = D[i]
+
+    def uncover(self, col: int) -> None:
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        i = U[col]
+        while i != col:
+            j = L[i]
+            while j != i:
+                S[C[j]] += 1
+                D[U[j]] = j; U[D[j]] = j
+                j = L[j]
+            i = U[i]
+        R[L[col]] = col; L[R[col]] = col
+
+_COVER_MATRIX: Optional[_CoverMatrix] = None
+
+def cover_matrix() -> _CoverMatrix:
+    """The per-process cover matrix, built on first use."""
+    global _COVER_MATRIX
+    if _COVER_MATRIX is None:
+        _COVER_MATRIX = _CoverMatrix()
+    return _COVER_MATRIX
+
+@_on_board
+def solve_with_dlx(board: Board,
+                   peek_seconds: float = DEFAULT_PEEK_SECONDS,
+                   instant: bool = False,
+                   stats: Optional[SolveStats] = None,
+                   timed: bool = False,
+                   trace: Optional[SolveTrace] = None,
+                   budget: Optional[SolveBudget] = None) -> SolveResult:
+    """Exact-cover solver (Dancing Links) with the same contract as `solve_with_mrv`.
+
+    Every cell is filled by search here, so `stats.propagated` stays 0;
+    `timed=True` puts the cover/uncover time in `stats.candidate_seconds`.
+    A spent `budget` unwinds the search level by level (the cover matrix is
+    shared, so every cover must be undone). Grids other than 9x9 go to
+    `solve_with_bitset`.
+    """
+    if len(board) != 9:
+        return solve_with_bitset(board, peek_seconds, instant, stats=stats, timed=timed, trace=trace,
+                                 budget=budget)
+    stats = stats if stats is not None else SolveStats()
+    if trace is not None:
+        trace.begin(board)
+    record = trace.append if trace is not None else None
+    cells = board.cells
+    m = cover_matrix()
+    tried = [0, 0, 0, 0]   # rows tried, nodes, backtracks, max depth
+    clock = [0.0]
+    with m.lock:
+        R, D, C, S = m.R, m.D, m.C, m.S
+        cover, uncover = m.cover, m.uncover
+        if timed:
+            cover, uncover = _clocked(cover, clock), _clocked(uncover, clock)
+        node_row = m.node_row
+
+        # Pre-select the givens; a clash means the puzzle has no solution.
+        given_rows = []
+        ok = True
+        for i in range(81):
+            v = cells[i]
+            if v:
+                first = m.row_node[i * 9 + v - 1]
+                j = first
+                while True:
+                    col = C[j]
+                    if R[m.L[col]] != col:       # header unlinked -> already covered
+                        ok = False
+                        break
+                    j = R[j]
+                    if j == first:
+                        break
+                if not ok:
+                    break
+                j = first
+                while True:
+                    cover(C[j])
+                    j = R[j]
+                    if j == first:
+                        break
+                given_rows.append(first)
+
+        poll = [_NEVER if budget is None else 1]   # node count of the next budget check
+
+        def _solve(peek, depth=0):
+            tried[1] += 1
+            if tried[1] >= poll[0]:
+                try:
+                    poll[0] = budget.poll(tried[1])
+                except _BudgetExceeded:
+                    poll[0] = _NEVER
+                    return False
+            if depth > tried[3]:
+                tried[3] = depth
+            if R[0] == 0:
+                if peek: peek.solved()
+                return True
+            col = R[0]
+            best, best_size = col, S[col]
+            while col and best_size > 1:
+                col = R[col]
+                if col and S[col] < best_size:
+                    best, best_size = col, S[col]
+            if best_size == 0:
+                return False
+            cover(best)
+            i = D[best]
+            while i != best:
+                rid = node_row[i]
+                k = rid // 9                      # cell index; the digit is rid % 9 + 1
+                cells[k] = rid % 9 + 1
+                tried[0] += 1
+                if record: record(k, rid % 9 + 1, True)
+                if peek:
+                    peek.current = (CELL_ROW[k], CELL_COL[k])
+                    peek.update()
+                j = R[i]
+                while j != i:
+                    cover(C[j])
+                    j = R[j]
+                found = _solve(peek, depth + 1)
+                j = m.L[i]
+                while j != i:
+                    uncover(C[j])
+                    j = m.L[j]
+                if found:
+                    uncover(best)
+                    return True
+                cells[k] = 0
+                tried[2] += 1
+                if record: record(k, rid % 9 + 1, False)
+                if peek: peek.update()
+                if budget is not None and budget.reason:
+                    break
+                i = D[i]
+            uncover(best)
+            return False
+
+        empty = 81 - len(given_rows)
+        try:
+            solved = ok and bool(_run_with_peek(board, peek_seconds, instant, _solve, stats))
+            stats.propagated, stats.searched = 0, (empty if solved else 0)
+            stats.guesses, stats.nodes, stats.backtracks, stats.max_depth = tried
+            stats.candidate_seconds = clock[0]
+            return SolveResult(solved, stats, _stop_reason(solved, budget))
+        finally:
+            # Restore the shared matrix for the next puzzle.
+            for first in reversed(given_rows):
+                j = m.L[first]
+                while True:
+                    uncover(C[j])
+                    if j == first:
+                        break
+                    j = m.L[j]
+
+# ======================= Solver (any size) =======================
+
+@_on_board
+def solve_with_bitset(board: Board,
+                      peek_seconds: float = DEFAULT_PEEK_SECONDS,
+                      instant: bool = False,
+                      propagate: bool = True,
+                      stats: Optional[SolveStats] = None,
+                      timed: bool = False,
+                      trace: Optional[SolveTrace] = None,
+                      budget: Optional[SolveBudget] = None) -> SolveResult:
+    """The `solve_with_mrv` search under its any-size name (4x4 up to 25x25).
+
+    `_MaskGrid` takes its tables from `grid_geometry`, so one search covers
+    every supported size; this entry point is kept for `--engine bitset`.
+    """
+    return solve_with_mrv(board, peek_seconds, instant, propagate, stats, timed, trace, budget)
+
+ENGINES = {"mrv": solve_with_mrv, "dlx": solve_with_dlx, "stack": solve_with_stack,
+           "bitset": solve_with_bitset}
+
+# ======================= Batch propagation (NumPy) =======================
+
+# Singles on a whole stack of 9x9 boards at once: boards as an (N, 81) uint8
+# array, candidates as an (N, 81) uint16 array of 9-bit masks. NumPy is only
+# imported when this is used.
+
+_NP_TABLES = None
+
+def _np_tables():
+    """(np, tables) with the unit / peer index arrays, built on first use."""
+    global _NP_TABLES
+    if _NP_TABLES is None:
+        import numpy as np
+        units = np.array(ROW_UNITS + COL_UNITS + BOX_UNITS, dtype=np.intp)        # (27, 9)
+        cell_units = np.array([(CELL_ROW[i], 9 + CELL_COL[i], 18 + CELL_BOX[i])
+                               for i in range(81)], dtype=np.intp)               # (81, 3)
+        # Where each cell sits in the flattened (27 * 9) unit view.
+        pos = np.zeros((81, 3), dtype=np.intp)
+        for i in range(81):
+            for k, u in enumerate(cell_units[i]):
+                pos[i, k] = u * 9 + list(units[u]).index(i)
+        _NP_TABLES = np, {
+            "units": units,
+            "cell_units": cell_units,
+            "unit_pos": pos,
+            "digit_bit": np.array(DIGIT_BIT, dtype=np.uint16),
+            "bit_digit": np.array(BIT_DIGIT, dtype=np.uint8),
+            "popcount": np.array(POPCOUNT, dtype=np.uint8),
+        }
+    return _NP_TABLES
+
+def propagate_many(boards: List[Board]):
+    """Naked and hidden singles on every 9x9 board (Board or list grid) at once, to a fixpoint.
+
+    Returns (grids, masks, status): grids (N, 9, 9) uint8 after propagation,
+    masks (N, 81) uint16 candidates (0 for filled cells), and status (N,) int8
+    with 1 = solved, 0 = needs search, -1 = contradiction (no solution).
+    """
+    np, t = _np_tables()
+    units, cell_units, unit_pos = t["units"], t["cell_units"], t["unit_pos"]
+    digit_bit, bit_digit, popcount = t["digit_bit"], t["bit_digit"], t["popcount"]
+    n = len(boards)
+    if all(isinstance(b, Board) for b in boards):
+        grids = np.frombuffer(b"".join(b.cells for b in boards), dtype=np.uint8).reshape(n, 81).copy()
     else:
-        return _solve()
+        grids = np.array([b.to_list() if isinstance(b, Board) else b for b in boards],
+                         dtype=np.uint8).reshape(n, 81)
+    masks = np.zeros((n, 81), dtype=np.uint16)
+    status = np.zeros(n, dtype=np.int8)
+    active = np.arange(n)
+    while active.size:
+        g = grids[active]
+        bits = digit_bit[g]                                       # (A, 81)
+        unit_bits = bits[:, units]                                # (A, 27, 9)
+        used = np.bitwise_or.reduce(unit_bits, axis=2)            # (A, 27)
+        # A digit twice in a unit makes the bit sum differ from the bit union.
+        bad = (unit_bits.sum(axis=2, dtype=np.uint16) != used).any(axis=1)
+        empty = g == 0
+        taken = np.bitwise_or.reduce(used[:, cell_units], axis=2)  # (A, 81)
+        m = np.where(empty, ~taken & ALL_DIGITS, 0).astype(np.uint16)
+        masks[active] = m
+        bad |= (empty & (m == 0)).any(axis=1)
+
+        unit_masks = m[:, units]                                  # (A, 27, 9)
+        once = np.zeros(used.shape, dtype=np.uint16)
+        twice = np.zeros(used.shape, dtype=np.uint16)
+        for k in range(9):
+            col = unit_masks[:, :, k]
+            twice |= once & col
+            once |= col
+        bad |= ((once | used) != ALL_DIGITS).any(axis=1)
+        solved = ~empty.any(axis=1) & ~bad
+
+        # Naked singles, then hidden ones (a digit with one spot left in a unit).
+        hidden = (unit_masks & (once & ~twice)[:, :, None]).reshape(len(active), 243)
+        found = np.bitwise_or.reduce(hidden[:, unit_pos], axis=2)  # (A, 81)
+        new = np.where(popcount[m] == 1, m, found)
+        new &= ~new + 1                                            # lowest bit only
+        progress = (new != 0).any(axis=1) & ~bad & ~solved
+        grids[active] = np.where(new != 0, bit_digit[new], g)
+
+        status[active[bad]] = -1
+        status[active[solved]] = 1
+        active = active[progress]
+    return grids.reshape(n, 9, 9), masks, status
+
+def solve_many(boards: List[Board], engine: str = "mrv",
+               stats: Optional[dict] = None, timeout: Optional[float] = None,
+               max_nodes: Optional[int] = None, reasons: Optional[list] = None) -> List[Optional[Board]]:
+    """Solve a list of 9x9 boards: vectorized singles first, then `engine` on what is left.
+
+    Returns the solved grids as Boards (None where there is no solution or
+    the search ran out of `timeout` / `max_nodes`, which apply per board); the
+    input boards are left unchanged. `stats` gets how many were settled by
+    propagation alone, handed to the search, found contradictory, or stopped;
+    `reasons` (a list) gets each board's `SolveResult.stopped`.
+    """
+    if not boards:
+        return []
+    grids, _masks, status = propagate_many(boards)
+    solve = ENGINES[engine]
+    out: List[Optional[Board]] = []
+    counts = {"propagated": 0, "searched": 0, "contradiction": 0, "stopped": 0}
+    limited = timeout is not None or max_nodes is not None
+    for row, st in zip(grids.reshape(len(boards), 81), status.tolist()):
+        grid = Board(row.tobytes())
+        res = None
+        if st == 1:
+            counts["propagated"] += 1
+            out.append(grid)
+        elif st == -1:
+            counts["contradiction"] += 1
+            out.append(None)
+        else:
+            counts["searched"] += 1
+            budget = SolveBudget(timeout, max_nodes) if limited else None
+            res = solve(grid, peek_seconds=0.0, instant=True, budget=budget)
+            counts["stopped"] += res.stopped is not None
+            out.append(grid if res else None)
+        if reasons is not None:
+            reasons.append(res.stopped if res is not None else None)
+    if stats is not None:
+        stats.update(counts)
+    return out
+
+# ======================= Trace replay =======================
+
+def replay_trace(trace: SolveTrace, fps: float = PEEK_REFRESH_PER_SECOND, steps_per_frame: int = 1,
+                 seconds: Optional[float] = None, start: int = 0, title: str = "Replay") -> int:
+    """Play `trace` back at a fixed `fps`; returns the number of frames shown.
+
+    Each frame applies `steps_per_frame` steps (fast-forward). With `seconds`
+    the trace is sampled to fit in that time instead. `start` skips ahead.
+    Without Rich only the final grid is printed.
+    """
+    total = len(trace)
+    start = max(0, min(start, total))
+    board = trace.board_at(start)
+    if seconds:
+        steps_per_frame = -(-(total - start) // max(1, int(fps * seconds)))
+    steps_per_frame = max(1, steps_per_frame)
+    if not _load_rich():
+        trace.apply(board, start, total)
+        print(render_board(board, title=f"{title} ({total} steps)"))
+        return 1
+
+    view = PeekRenderer(board, title=f"{title} — step {start}/{total}")
+    period = 1.0 / max(fps, 1e-3)
+    frames, pos = 0, start
+    with Live(view, console=console, auto_refresh=False) as live:
+        next_frame = time.perf_counter()
+        while pos < total:
+            end = min(total, pos + steps_per_frame)
+            i = trace.apply(board, pos, end)
+            pos = end
+            view.highlight = (CELL_ROW[i], CELL_COL[i])
+            view.title = f"{title} — step {pos}/{total}"
+            live.refresh()
+            frames += 1
+            next_frame += period
+            delay = next_frame - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        view.highlight = None
+        view.title = f"{title} — done ({total} steps)"
+        live.refresh()
+    return frames
+
+# ======================= Solution counting =======================
+
+def count_solutions(board: Board, limit: int = 2,
+                    stats: Optional[SolveStats] = None,
+                    budget: Optional[SolveBudget] = None) -> int:
+    """Number of solutions of `board` (left unchanged); counting stops at `limit`.
+
+    Runs the bitmask/singles search of `StepSolver` and backtracks out of each
+    solution found, so `limit=2` bails out on the second one. When `budget`
+    runs out, the count so far is returned and `budget.reason` is set.
+    """
+    solver = StepSolver(Board.parse(board), stats=stats)
+    count = 0
+    try:
+        found = solver.run(budget)
+        while found:
+            count += 1
+            if count >= limit:
+                break
+            found = solver.next_solution(budget)
+    except _BudgetExceeded:
+        pass
+    return count
+
+def is_unique(board: Board) -> bool:
+    """True when `board` has exactly one solution."""
+    return count_solutions(board, limit=2) == 1
+
+def _check_worker(line: str, limit: int = 2) -> Tuple[int, int]:
+    """Worker: (solution count capped at `limit`, search nodes); count -1 for a malformed line."""
+    try:
+        board = Board.parse(line)
+    except ValueError:
+        return -1, 0
+    st = SolveStats()
+    return count_solutions(board, limit=limit, stats=st), st.nodes
+
+def run_check_unique(path: str, output: Optional[str] = None, workers: Optional[int] = None,
+                     chunk_size: int = BATCH_CHUNK_SIZE, limit: int = 2) -> int:
+    """Check every puzzle in `path` for a unique solution over a process pool.
+
+    Writes one tab-separated line per puzzle that is not unique:
+    line number, solution count ("2+" when the limit was hit, "invalid" for
+    malformed lines), search nodes, puzzle. A summary goes to stderr.
+    """
+    with open(path, encoding="utf-8") as f:
+        numbered = [(n, ln.strip()) for n, ln in enumerate(f, 1)]
+    numbered = [(n, ln) for n, ln in numbered if ln and not ln.startswith("#")]
+    lines = [ln for _, ln in numbered]
+    workers = max(1, workers or os.cpu_count() or 1)
+    limit = max(2, limit)
+    check_line = partial(_check_worker, limit=limit)
+
+    out = open(output, "w", encoding="utf-8") if output else sys.stdout
+    tally = {"unique": 0, "ambiguous": 0, "unsolvable": 0, "invalid": 0}
+    t0 = time.perf_counter()
+    try:
+        if workers == 1:
+            results = map(check_line, lines)
+            pool = None
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            pool = ProcessPoolExecutor(max_workers=workers)
+            results = pool.map(check_line, lines, chunksize=max(1, chunk_size))
+        try:
+            for (n, line), (count, nodes) in zip(numbered, results):
+                if count == 1:
+                    tally["unique"] += 1
+                    continue
+                if count < 0:
+                    tally["invalid"] += 1
+                    shown = "invalid"
+                elif count == 0:
+                    tally["unsolvable"] += 1
+                    shown = "0"
+                else:
+                    tally["ambiguous"] += 1
+                    shown = f"{count}+" if count >= limit else str(count)
+                out.write(f"{n}\t{shown}\t{nodes}\t{line}\n")
+        finally:
+            if pool is not None:
+                pool.shutdown()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        else:
+            out.flush()
+    elapsed = time.perf_counter() - t0
+    print(f"Checked {len(lines)} puzzles in {elapsed:.2f}s — " +
+          ", ".join(f"{k}: {v}" for k, v in tally.items()), file=sys.stderr)
+    return 0 if tally["unique"] == len(lines) else 2
+
+# ======================= Parallel search =======================
+
+def split_search(board: Board, parts: int,
+                 stats: Optional[SolveStats] = None) -> Tuple[List[bytes], List[bytes]]:
+    """Expand the top of the MRV tree breadth-first into at least `parts` open subproblems.
+
+    Each node is filled with singles first; dead ends are dropped and the
+    branches of its most constrained cell are queued in digit order, so the
+    subproblems cover the whole search space in roughly serial search order.
+    Returns (subproblem cells, solutions met on the way); both are bytes
+    snapshots of the flat grid and `board` is left unchanged. Expanded
+    nodes are added to `stats.nodes`.
+    """
+    board = as_board(board)
+    frontier = deque([bytes(board.cells)])
+    solutions = []
+    while frontier and len(frontier) < parts:
+        g = _MaskGrid(Board(frontier.popleft(), board.size))
+        if stats is not None:
+            stats.nodes += 1
+        if not g.valid or not g.fill_singles([]):
+            continue
+        i = g.pick()
+        if i < 0:
+            solutions.append(bytes(g.cells))
+            continue
+        todo = g.take(i)
+        while todo:
+            bit = todo & -todo
+            todo ^= bit
+            child = bytearray(g.cells)
+            child[i] = bit.bit_length()
+            frontier.append(bytes(child))
+    return list(frontier), solutions
+
+
+class _SharedCancel(CancelToken):
+    """CancelToken on a shared-memory byte, so the parent can stop searches in pool workers."""
+
+    __slots__ = ("flag",)
+
+    def __init__(self, flag):
+        self.flag = flag
+
+    @property
+    def cancelled(self) -> bool:
+        return bool(self.flag.value)
+
+    def cancel(self) -> None:
+        self.flag.value = 1
+
+
+_WORKER_CANCEL: Optional[_SharedCancel] = None
+
+def _init_parallel_worker(flag) -> None:
+    global _WORKER_CANCEL
+    _WORKER_CANCEL = _SharedCancel(flag)
+
+def _parallel_worker(cells: bytes, size: int, engine: str, limit: int,
+                     timeout: Optional[float]) -> Tuple[Optional[bytes], int, int]:
+    """Worker: search one subproblem; (solution or None, solutions counted, nodes).
+
+    `limit` > 0 counts solutions up to it instead of stopping at the first.
+    The shared flag stops the search at its next budget poll.
+    """
+    board = Board(cells, size)
+    stats = SolveStats()
+    budget = SolveBudget(timeout, cancel=_WORKER_CANCEL)
+    if limit:
+        return None, count_solutions(board, limit, stats, budget), stats.nodes
+    res = ENGINES[engine](board, peek_seconds=0.0, instant=True, stats=stats, budget=budget)
+    return (bytes(board.cells) if res else None), int(bool(res)), stats.nodes
+
+
+class ParallelSolver:
+    """Split one puzzle's search tree over a process pool.
+
+    `split_search` cuts the puzzle into `workers * split_factor` subproblems,
+    each submitted as its own task: the pool's shared call queue hands the
+    next one to whichever worker is idle, so a worker stuck in a big subtree
+    doesn't hold the others back (work stealing by over-decomposition).
+    `solve` takes the first solution any worker finds and `count` stops once
+    `limit` solutions are in; either way the other workers are stopped
+    through a shared flag that their budgets poll. Reuse one instance for
+    many puzzles: the pool is started once.
+    """
+
+    def __init__(self, workers: Optional[int] = None, engine: str = "mrv",
+                 split_factor: int = PARALLEL_SPLIT_FACTOR):
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine: {engine}")
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.engine = engine
+        self.split_factor = max(1, split_factor)
+        self.flag = multiprocessing.RawValue("b", 0)
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_parallel_worker,
+                                        initargs=(self.flag,))
+        self.subproblems = 0
+
+    def solve(self, board: Board, stats: Optional[SolveStats] = None,
+              budget: Optional[SolveBudget] = None) -> SolveResult:
+        """Solve `board` in place; honours the budget's deadline and CancelToken (not its node cap)."""
+        board = as_board(board)
+        stats = stats if stats is not None else SolveStats()
+        t0 = time.perf_counter()
+        found, _count, stopped = self._search(board, 0, stats, budget)
+        if found is not None:
+            board.cells[:] = found
+        stats.solve_seconds = time.perf_counter() - t0
+        return SolveResult(found is not None, stats, stopped)
+
+    def count(self, board: Board, limit: int = 2, stats: Optional[SolveStats] = None,
+              budget: Optional[SolveBudget] = None) -> int:
+        """Number of solutions of `board`, stopping at `limit` (like `count_solutions`)."""
+        board = as_board(board)
+        stats = stats if stats is not None else SolveStats()
+        t0 = time.perf_counter()
+        n = self._search(board, max(1, limit), stats, budget)[1]
+        stats.solve_seconds = time.perf_counter() - t0
+        return min(n, max(1, limit))
+
+    def _search(self, board: Board, limit: int, stats: SolveStats,
+                budget: Optional[SolveBudget]) -> Tuple[Optional[bytes], int, Optional[str]]:
+        from concurrent.futures import FIRST_COMPLETED, wait
+        parts, solutions = split_search(board, self.workers * self.split_factor, stats)
+        self.subproblems = len(parts)
+        found = solutions[0] if solutions else None
+        count = len(solutions)
+        if (found is not None and not limit) or (limit and count >= limit) or not parts:
+            return found, count, None
+        deadline = budget.deadline if budget is not None else None
+        self.flag.value = 0
+        pending = {self.pool.submit(_parallel_worker, cells, board.size, self.engine, limit,
+                                    None if deadline is None else max(0.0, deadline - time.monotonic()))
+                   for cells in parts}
+        stopped = None
+        try:
+            while pending:
+                done, pending = wait(pending, timeout=0.05, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    sol, n, nodes = fut.result()
+                    stats.nodes += nodes
+                    count += n
+                    if found is None:
+                        found = sol
+                if (found is not None and not limit) or (limit and count >= limit):
+                    break
+                if budget is not None and budget.cancel is not None and budget.cancel.cancelled:
+                    stopped = budget.reason = "cancelled"
+                    break
+                if deadline is not None and time.monotonic() >= deadline:
+                    stopped = budget.reason = "timeout"
+                    break
+        finally:
+            self.flag.value = 1
+            for fut in pending:
+                fut.cancel()
+            wait(pending)
+            for fut in pending:
+                if not fut.cancelled():
+                    _sol, n, nodes = fut.result()
+                    stats.nodes += nodes
+                    count += n
+        return found, count, stopped
+
+    def close(self) -> None:
+        self.flag.value = 1
+        self.pool.shutdown(cancel_futures=True)
+
+    def __enter__(self) -> "ParallelSolver":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def solve_parallel(board: Board,
+                   peek_seconds: float = DEFAULT_PEEK_SECONDS,
+                   instant: bool = False,
+                   stats: Optional[SolveStats] = None,
+                   timed: bool = False,
+                   trace: Optional[SolveTrace] = None,
+                   budget: Optional[SolveBudget] = None,
+                   workers: Optional[int] = None,
+                   engine: str = "mrv") -> SolveResult:
+    """Engine-shaped wrapper around a one-off `ParallelSolver` (no peek animation or trace)."""
+    if trace is not None:
+        raise ValueError("A parallel solve can't be recorded")
+    with ParallelSolver(workers, engine) as ps:
+        return ps.solve(board, stats, budget)
+
+# ======================= Symmetry & solve cache =======================
+
+# Transposition, band/stack swaps, row/column swaps inside a band/stack and
+# digit relabeling all map a puzzle onto an equivalent one. `canonical_form`
+# picks one representative per class (the row-major minimum, digits labelled
+# 1, 2, ... in order of first appearance), so `SolveCache` can solve each
+# class once and map the stored solution back onto every variant.
+
+_FRESH = 1 << 8     # stands in for "next unused label" when ordering a tied block of stacks
+
+@dataclass(frozen=True)
+class SymmetryTransform:
+    """Source -> canonical mapping: out[r][c] = digits[src[rows[r]][cols[c]]] (src transposed first)."""
+    transpose: bool
+    rows: Tuple[int, ...]
+    cols: Tuple[int, ...]
+    digits: Tuple[int, ...]      # digits[v] = label of source value v (digits[0] = 0)
+
+    def apply(self, board) -> Board:
+        """The transformed copy of `board`."""
+        board = as_board(board)
+        s, src = board.size, board.cells
+        if self.transpose:
+            src = bytes(src[c * s + r] for r in range(s) for c in range(s))
+        table = bytes(self.digits) + bytes(256 - len(self.digits))
+        out = bytes(src[r * s + c] for r in self.rows for c in self.cols).translate(table)
+        return Board(out, s)
+
+    def undo(self, board) -> Board:
+        """Inverse of `apply`: a canonical grid (e.g. its solution) back in source coordinates."""
+        board = as_board(board)
+        s, cells = board.size, board.cells
+        inverse = bytearray(256)
+        for v, label in enumerate(self.digits):
+            inverse[label] = v
+        src = bytearray(s * s)
+        for i, r in enumerate(self.rows):
+            for j, c in enumerate(self.cols):
+                src[r * s + c] = cells[i * s + j]
+        if self.transpose:
+            src = bytes(src[c * s + r] for r in range(s) for c in range(s))
+        return Board(bytes(src).translate(bytes(inverse)), s)
+
+    @classmethod
+    def random(cls, size: int = 9, rng: Optional[random.Random] = None) -> "SymmetryTransform":
+        """A uniformly random validity-preserving transform of an N x N grid."""
+        rng = rng or random
+        n = math.isqrt(size)
+
+        def lines():
+            bands = rng.sample(range(n), n)
+            return tuple(b * n + k for b in bands for k in rng.sample(range(n), n))
+        return cls(rng.random() < 0.5, lines(), lines(), (0,) + tuple(rng.sample(range(1, size + 1), size)))
+
+def _order_group(rv, group, labels):
+    """Split one tied column group by the row values `rv`: (zero cols, [(label, col)], fresh cols)."""
+    zeros, labeled, fresh = [], [], []
+    for c in group:
+        v = rv[c]
+        if not v:
+            zeros.append(c)
+        elif labels[v]:
+            labeled.append((labels[v], c))
+        else:
+            fresh.append(c)
+    labeled.sort()
+    return tuple(zeros), labeled, fresh
+
+def _order_stack(rv, groups, states, branch: bool):
+    """Extend each (segment, blocks, labels, next) state with one stack's minimal column order.
+
+    Zeros go first, then known labels ascending, then digits seen for the
+    first time (which take the next labels). Several new digits in one tied
+    group give the same segment but different labelings; with `branch` every
+    ordering becomes its own state, otherwise only the first is kept.
+    """
+    for group in groups:
+        zeros, labeled, fresh = _order_group(rv, group, states[0][2])
+        orders = list(permutations(fresh)) if branch and len(fresh) > 1 else [fresh]
+        head = (0,) * len(zeros) + tuple(label for label, _ in labeled)
+        parts = ([zeros] if zeros else []) + [(c,) for _, c in labeled]
+        grown = []
+        for seg, out, labels, nxt in states:
+            for order in orders:
+                new_labels = labels[:] if order else labels
+                tail = []
+                for c in order:
+                    new_labels[rv[c]] = nxt + len(tail)
+                    tail.append(nxt + len(tail))
+                grown.append((seg + head + tuple(tail), out + parts + [(c,) for c in order],
+                               new_labels, nxt + len(tail)))
+        states = grown
+    return states
+
+def _order_row(rv, blocks, labels, nxt, branch: bool = False):
+    """Every minimal way to lay out row `rv` under the column structure `blocks`.
+
+    `blocks` is a list of stack blocks in output order; a block holds one
+    stack `(s, groups)` or several stacks still interchangeable (all empty so
+    far, each a single group). Returns [(segment, blocks, labels, next)]; all
+    entries share one segment.
+    """
+    states = [((), [], labels, nxt)]
+    for block in blocks:
+        if len(block) == 1:
+            s, groups = block[0]
+            grown = []
+            for seg, out, lab, nx in states:
+                for seg2, parts, lab2, nx2 in _order_stack(rv, groups, [(seg, [], lab, nx)], branch):
+                    grown.append((seg2, out + [[(s, parts)]], lab2, nx2))
+            states = grown
+            continue
+        keyed = []
+        for s, groups in block:
+            zeros, labeled, fresh = _order_group(rv, groups[0], labels)
+            key = (0,) * len(zeros) + tuple(label for label, _ in labeled) + tuple(
+                _FRESH + k for k in range(len(fresh)))
+            keyed.append((key, s, groups))
+        keyed.sort(key=lambda t: (t[0], t[1]))
+        for key, run in groupby(keyed, key=lambda t: t[0]):
+            run = [(s, groups) for _, s, groups in run]
+            if not any(key):                             # still empty: stays one tied block
+                states = [(seg + key * len(run), out + [run], lab, nx) for seg, out, lab, nx in states]
+                continue
+            orders = list(permutations(run)) if branch and len(run) > 1 else [run]
+            grown = []
+            for seg, out, lab, nx in states:
+                for order in orders:
+                    partial_states = [(seg, out, lab, nx)]
+                    for s, groups in order:
+                        partial_states = [
+                            (seg2, out2 + [[(s, parts)]], lab2, nx2)
+                            for seg1, out2, lab1, nx1 in partial_states
+                            for seg2, parts, lab2, nx2 in _order_stack(rv, groups, [(seg1, [], lab1, nx1)],
+                                                                       branch)
+                        ]
+                    grown += partial_states
+            states = grown
+    return states if branch else states[:1]
+
+def _row_key(rv, blocks, labels, nxt) -> tuple:
+    """The segment `_order_row` would produce, without building the layouts."""
+    seg = []
+    for block in blocks:
+        keys = []
+        for _, groups in block:
+            key = []
+            for group in groups:
+                zeros, known, fresh = 0, [], 0
+                for c in group:
+                    v = rv[c]
+                    if not v:
+                        zeros += 1
+                    elif labels[v]:
+                        known.append(labels[v])
+                    else:
+                        fresh += 1
+                known.sort()
+                key += [0] * zeros + known + [_FRESH] * fresh
+            keys.append(key)
+        if len(keys) > 1:
+            keys.sort()
+        for key in keys:
+            for v in key:
+                if v == _FRESH:
+                    v, nxt = nxt, nxt + 1
+                seg.append(v)
+    return tuple(seg)
+
+def _next_rows(rows: Tuple[int, ...], grid: bytes, size: int, n: int) -> List[int]:
+    """Source rows that may come next: the rest of the current band, else any unused band.
+
+    Two empty rows of one band are interchangeable, so only the first is offered.
+    """
+    if len(rows) % n:
+        band = rows[-1] // n
+        pool = [r for r in range(band * n, band * n + n) if r not in rows]
+    else:
+        used = {r // n for r in rows}
+        pool = [r for b in range(n) if b not in used for r in range(b * n, b * n + n)]
+    out, empty_bands = [], set()
+    for r in pool:
+        if not any(grid[r * size:(r + 1) * size]):
+            if r // n in empty_bands:
+                continue
+            empty_bands.add(r // n)
+        out.append(r)
+    return out
+
+def canonical_form(board) -> Tuple[Board, SymmetryTransform]:
+    """(canonical grid, transform from `board` to it); equivalent puzzles share the grid.
+
+    Builds the row-major minimum row by row over both orientations, keeping
+    only the partial layouts that tie for the smallest prefix. Columns that
+    no row has told apart yet stay in tied groups instead of being
+    enumerated, so a 9x9 puzzle costs a few hundred row layouts, not the
+    3.4 million transforms of the full group.
+    """
+    board = as_board(board)
+    size, n = board.size, board.n
+    cells = bytes(board.cells)
+    grids = (cells, bytes(cells[c * size + r] for r in range(size) for c in range(size)))
+    start = [[(s, [tuple(range(s * n, s * n + n))]) for s in range(n)]]
+    cands = [(o, (), start, [0] * (size + 1), 1) for o in (0, 1)]
+    for _ in range(size):
+        best, winners = None, []
+        for o, rows, blocks, labels, nxt in cands:
+            grid = grids[o]
+            for r in _next_rows(rows, grid, size, n):
+                rv = grid[r * size:(r + 1) * size]
+                seg = _row_key(rv, blocks, labels, nxt)
+                if best is None or seg < best:
+                    best, winners = seg, [(o, rows, blocks, labels, nxt, r, rv)]
+                elif seg == best:
+                    winners.append((o, rows, blocks, labels, nxt, r, rv))
+        cands = [(o, rows + (r,), blocks2, labels2, nxt2)
+                 for o, rows, blocks, labels, nxt, r, rv in winners
+                 for _, blocks2, labels2, nxt2 in _order_row(rv, blocks, labels, nxt, branch=True)]
+    o, rows, blocks, labels, nxt = cands[0]
+    cols = tuple(c for block in blocks for _, groups in block for group in groups for c in group)
+    for v in range(1, size + 1):
+        if not labels[v]:
+            labels[v] = nxt
+            nxt += 1
+    transform = SymmetryTransform(bool(o), rows, cols, tuple(labels))
+    return transform.apply(board), transform
+
+class SolveCache:
+    """Solutions keyed by canonical form: an in-memory LRU in front of an SQLite file.
+
+    `solve()` canonicalizes the puzzle, looks the class up (memory, then
+    disk), solves the canonical grid on a miss and maps the answer back, so
+    relabeled / reflected / shuffled copies of a puzzle are solved once.
+    Unsolvable classes are cached too. Safe to share one file between
+    processes; each keeps its own LRU and connection. `path=":memory:"` skips
+    the disk.
+    """
+
+    def __init__(self, path: Optional[str] = None, size: int = SOLVE_CACHE_SIZE, engine: str = "mrv"):
+        self.path = path or os.path.join(default_cache_dir(), SOLVE_CACHE_FILE)
+        self.size = max(1, size)
+        self.engine = engine
+        self.lru = OrderedDict()        # canonical string -> (solution string or "", solve seconds)
+        self.db = None
+        self.hits = {"memory": 0, "disk": 0, "miss": 0}
+        self.skipped = 0                # nearly full grids solved without the cache
+        self.stopped = 0                # misses whose solve ran out of budget (not cached)
+        self.canon_seconds = 0.0        # spent canonicalizing and mapping back
+        self.lookup_seconds = 0.0       # spent in the LRU / on disk
+        self.solve_seconds = 0.0        # spent solving misses
+        self.saved_seconds = 0.0        # recorded solve time of every hit
+
+    def _open(self):
+        if self.db is None:
+            import sqlite3
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            try:
+                self.db = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+                self.db.execute("PRAGMA journal_mode=WAL")
+                self.db.execute("PRAGMA synchronous=NORMAL")
+                self.db.execute("CREATE TABLE IF NOT EXISTS solutions "
+                                "(canon TEXT PRIMARY KEY, solution TEXT NOT NULL, seconds REAL NOT NULL)")
+            except sqlite3.Error as e:
+                self.db = None
+                raise OSError(f"solve cache {self.path}: {e}") from e
+        return self.db
+
+    def _remember(self, key: str, entry: Tuple[str, float]) -> None:
+        self.lru[key] = entry
+        if len(self.lru) > self.size:
+            self.lru.popitem(last=False)
+
+    def lookup(self, key: str) -> Tuple[Optional[Tuple[str, float]], str]:
+        """(entry or None, "memory" / "disk" / "miss") for a canonical string."""
+        entry = self.lru.get(key)
+        if entry is not None:
+            self.lru.move_to_end(key)
+            return entry, "memory"
+        row = self._open().execute("SELECT solution, seconds FROM solutions WHERE canon = ?",
+                                   (key,)).fetchone()
+        if row is None:
+            return None, "miss"
+        self._remember(key, row)
+        return row, "disk"
+
+    def store(self, key: str, solution: str, seconds: float) -> None:
+        self._remember(key, (solution, seconds))
+        self._open().execute("INSERT OR REPLACE INTO solutions VALUES (?, ?, ?)", (key, solution, seconds))
+
+    def solve(self, board, budget: Optional[SolveBudget] = None) -> Tuple[Optional[Board], str]:
+        """(solution Board or None, "memory" / "disk" / "miss" / "skip" / "stopped").
+
+        Nearly full grids (fewer blanks than one row) are solved directly:
+        singles finish them at once, and their many tied relabelings make
+        canonicalization the slow part. `budget` limits the solve on a miss;
+        a stopped solve ("stopped") is not cached.
+        """
+        perf = time.perf_counter
+        board = as_board(board)
+        if board.cells.count(0) < board.size:
+            self.skipped += 1
+            work = board.copy()
+            res = ENGINES[self.engine](work, peek_seconds=0.0, instant=True, budget=budget)
+            return (work if res else None), ("stopped" if res.stopped else "skip")
+        t0 = perf()
+        canon, transform = canonical_form(board)
+        key = board_to_string(canon)
+        t1 = perf()
+        entry, hit = self.lookup(key)
+        t2 = perf()
+        self.canon_seconds += t1 - t0
+        self.lookup_seconds += t2 - t1
+        self.hits[hit] += 1
+        if entry is None:
+            res = ENGINES[self.engine](canon, peek_seconds=0.0, instant=True, budget=budget)
+            secs = perf() - t2
+            self.solve_seconds += secs
+            if res.stopped:
+                self.hits["miss"] -= 1
+                self.stopped += 1
+                return None, "stopped"
+            entry = (board_to_string(canon) if res else "", secs)
+            self.store(key, *entry)
+            t2 = perf()
+        else:
+            self.saved_seconds += entry[1]
+        solution = transform.undo(Board.parse(entry[0])) if entry[0] else None
+        self.canon_seconds += perf() - t2
+        return solution, hit
+
+    def report(self) -> dict:
+        """Hit counts and rate, plus the canonicalization cost against the solve time it saved."""
+        total = sum(self.hits.values())
+        return {
+            "lookups": total, **self.hits, "skipped": self.skipped, "stopped": self.stopped,
+            "hit_rate": (total - self.hits["miss"]) / total if total else 0.0,
+            "canon_seconds": self.canon_seconds, "lookup_seconds": self.lookup_seconds,
+            "solve_seconds": self.solve_seconds, "saved_seconds": self.saved_seconds,
+            "net_seconds": self.saved_seconds - self.canon_seconds - self.lookup_seconds,
+        }
+
+    def close(self) -> None:
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+# ======================= Puzzle generator =======================
+
+# Dig holes down to this many clues (0 = until no clue can go without losing uniqueness)
+GENERATOR_TARGET_CLUES = {"easy": 38, "medium": 30, "hard": 0}
+GENERATOR_SEED_CLUES   = 11     # random givens that seed a fresh full grid
+GENERATOR_ATTEMPTS     = 20     # grids tried before settling for another grade
+GENERATOR_ROUNDS       = 10     # --generate: rounds of fresh seeds to replace off-grade puzzles
+GRADE_EASY_MIN_CLUES   = 34     # singles-only puzzles with fewer clues count as medium
+GRADE_MEDIUM_MAX_GUESSES = 8
+
+def random_full_grid(rng: random.Random) -> Board:
+    """A random solved grid: a few random consistent givens, then solved."""
+    while True:
+        board = Board()
+        used = [0] * 27
+        for i in rng.sample(range(81), GENERATOR_SEED_CLUES):
+            r, c, b = CELL_ROW[i], CELL_COL[i], CELL_BOX[i]
+            free = ~(used[r] | used[9 + c] | used[18 + b]) & ALL_DIGITS
+            if not free:
+                continue
+            n = rng.choice(MASK_DIGITS[free])
+            board.cells[i] = n
+            bit = DIGIT_BIT[n]
+            used[r] |= bit; used[9 + c] |= bit; used[18 + b] |= bit
+        if solve_with_mrv(board, peek_seconds=0.0, instant=True):
+            return board
+
+def grade_puzzle(board: Board) -> Tuple[str, int]:
+    """Difficulty from search effort: (easy|medium|hard, guesses needed by MRV + singles)."""
+    st = SolveStats()
+    board = Board.parse(board)
+    clues = board.filled()
+    solve_with_mrv(board, peek_seconds=0.0, instant=True, stats=st)
+    if st.guesses == 0:
+        return ("easy" if clues >= GRADE_EASY_MIN_CLUES else "medium"), 0
+    return ("medium" if st.guesses <= GRADE_MEDIUM_MAX_GUESSES else "hard"), st.guesses
+
+def generate_puzzle(difficulty: str, rng: Optional[random.Random] = None) -> Tuple[Board, Board, str]:
+    """Unique-solution puzzle graded `difficulty` (best effort); returns (puzzle, solution, grade).
+
+    Clues are removed in random order; a removal is kept only while the puzzle
+    still has exactly one solution.
+    """
+    rng = rng or random.Random()
+    target = GENERATOR_TARGET_CLUES.get(difficulty, 0)
+    for _ in range(GENERATOR_ATTEMPTS):
+        solution = random_full_grid(rng)
+        puzzle = solution.copy()
+        cells = puzzle.cells
+        clues = 81
+        for i in rng.sample(range(81), 81):
+            if clues <= target:
+                break
+            cells[i] = 0
+            if is_unique(puzzle):
+                clues -= 1
+            else:
+                cells[i] = solution.cells[i]
+        grade, _ = grade_puzzle(puzzle)
+        if grade == difficulty:
+            break
+    return puzzle, solution, grade
+
+def _generate_worker(job: Tuple[str, int]) -> Tuple[str, str, str]:
+    """Worker: (difficulty, seed) -> (puzzle, solution, grade) as 81-digit strings."""
+    difficulty, seed = job
+    puzzle, solution, grade = generate_puzzle(difficulty, random.Random(seed))
+    return board_to_string(puzzle), board_to_string(solution), grade
+
+def run_generate(difficulty: str, count: int, output: Optional[str] = None,
+                 workers: Optional[int] = None, chunk_size: int = 4,
+                 seed: Optional[int] = None) -> int:
+    """Generate `count` puzzles over a process pool; one puzzle per line ('.' for blanks).
+
+    Only puzzles that `grade_puzzle` rates `difficulty` are written; the rest
+    are dropped and replaced from fresh seeds, for up to `GENERATOR_ROUNDS`
+    rounds. The output feeds straight into `--batch`. A summary goes to
+    stderr; returns 1 when fewer than `count` puzzles of the grade were found.
+    """
+    seed = random.randrange(1 << 30) if seed is None else seed
+    workers = max(1, workers or os.cpu_count() or 1)
+    out = open(output, "w", encoding="utf-8") if output else sys.stdout
+    written, dropped = 0, {}
+    t0 = time.perf_counter()
+    try:
+        pool = None
+        if workers > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            pool = ProcessPoolExecutor(max_workers=workers)
+        try:
+            for _ in range(GENERATOR_ROUNDS):
+                if written >= count:
+                    break
+                jobs = [(difficulty, seed + k) for k in range(count - written)]
+                seed += len(jobs)
+                results = (map(_generate_worker, jobs) if pool is None
+                           else pool.map(_generate_worker, jobs, chunksize=max(1, chunk_size)))
+                for puzzle, _solution, grade in results:
+                    if grade != difficulty:
+                        dropped[grade] = dropped.get(grade, 0) + 1
+                        continue
+                    written += 1
+                    out.write(puzzle.replace("0", ".") + "\n")
+        finally:
+            if pool is not None:
+                pool.shutdown()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        else:
+            out.flush()
+    elapsed = time.perf_counter() - t0
+    rate = written / elapsed if elapsed > 0 else 0.0
+    summary = ", ".join(f"{g}: {n}" for g, n in sorted(dropped.items()))
+    print(f"Generated {written} '{difficulty}' puzzles in {elapsed:.2f}s "
+          f"({rate:.1f} puzzles/s, {workers} worker(s)) — dropped as off-grade: {summary or 'none'}",
+          file=sys.stderr)
+    if written < count:
+        print(f"Only {written} of {count} puzzles graded '{difficulty}' after "
+              f"{GENERATOR_ROUNDS} rounds.", file=sys.stderr)
+        return 1
+    return 0
+
+# ======================= Puzzle bank =======================
+
+class PuzzleBank:
+    """Read-only puzzle bank file, memory-mapped: graded puzzles with their solutions.
+
+    Layout: a header (magic, cells per grid, tier count, record count), one
+    index entry per difficulty (name, first record, count), then fixed-size
+    records of puzzle cells followed by solution cells, one byte per cell
+    (0 = blank) and grouped by difficulty. `pick()` reads one record at a
+    computed offset, so only the pages it touches are loaded. `path=None`
+    opens the bank bundled next to this script.
+    """
+
+    MAGIC = b"SDKBANK1"
+    HEADER = struct.Struct("<8sHHI")
+    TIER = struct.Struct("<16sII")
+
+    def __init__(self, path: Optional[str] = None):
+        import mmap
+        self.path = path or os.path.join(os.path.dirname(os.path.abspath(__file__)), PUZZLE_BANK_FILE)
+        with open(self.path, "rb") as f:
+            try:
+                self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise ValueError(f"{self.path}: not a puzzle bank") from None
+        try:
+            if len(self.data) < self.HEADER.size:
+                raise ValueError(f"{self.path}: not a puzzle bank")
+            magic, cells, tiers, total = self.HEADER.unpack_from(self.data, 0)
+            size = GRID_SIDES.get(cells)
+            if magic != self.MAGIC or size is None:
+                raise ValueError(f"{self.path}: not a puzzle bank")
+            self.size = size
+            self.record = 2 * cells
+            self.start = self.HEADER.size + tiers * self.TIER.size
+            if len(self.data) < self.start + total * self.record:
+                raise ValueError(f"{self.path}: truncated puzzle bank")
+            self.tiers = {}
+            for k in range(tiers):
+                name, first, count = self.TIER.unpack_from(self.data, self.HEADER.size + k * self.TIER.size)
+                if first + count > total:
+                    raise ValueError(f"{self.path}: bad index entry")
+                self.tiers[name.rstrip(b"\0").decode("ascii")] = (first, count)
+            self.total = total
+        except (ValueError, struct.error):
+            self.data.close()
+            raise
+
+    def __len__(self) -> int:
+        return self.total
+
+    def count(self, difficulty: str) -> int:
+        return self.tiers.get(difficulty, (0, 0))[1]
+
+    def get(self, index: int) -> Tuple[Board, Board]:
+        """(puzzle, solution) of record `index`."""
+        if not 0 <= index < self.total:
+            raise IndexError(index)
+        off = self.start + index * self.record
+        half = self.record // 2
+        return (Board(bytearray(self.data[off:off + half]), self.size),
+                Board(bytearray(self.data[off + half:off + self.record]), self.size))
+
+    def pick(self, difficulty: str, rng: Optional[random.Random] = None) -> Optional[Tuple[Board, Board]]:
+        """A random (puzzle, solution) of `difficulty`, or None when the bank has none."""
+        first, count = self.tiers.get(difficulty, (0, 0))
+        if not count:
+            return None
+        return self.get(first + (rng or random).randrange(count))
+
+    @classmethod
+    def write(cls, path: str, tiers: dict) -> None:
+        """Write {difficulty: [(puzzle, solution), ...]} (Boards of one size) to `path` atomically."""
+        grids = [g for entries in tiers.values() for pair in entries for g in pair]
+        cells = len(grids[0].cells) if grids else 81
+        if any(len(g.cells) != cells for g in grids):
+            raise ValueError("All grids in a bank must have the same size")
+        index, records, first = [], [], 0
+        for name, entries in tiers.items():
+            index.append(cls.TIER.pack(name.encode("ascii"), first, len(entries)))
+            records += [bytes(p.cells) + bytes(s.cells) for p, s in entries]
+            first += len(entries)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(cls.HEADER.pack(cls.MAGIC, cells, len(index), first))
+            f.write(b"".join(index))
+            f.write(b"".join(records))
+        os.replace(tmp, path)
+
+    def close(self) -> None:
+        self.data.close()
+
+    def __enter__(self) -> "PuzzleBank":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _bank_worker(line: str) -> Tuple[str, bytes, bytes]:
+    """Worker: (grade, puzzle cells, solution cells) or ("invalid"/"unsolvable"/"ambiguous", b"", b"")."""
+    try:
+        board = Board.parse(line)
+    except ValueError:
+        return "invalid", b"", b""
+    if board.size != 9:
+        return "invalid", b"", b""
+    n = count_solutions(board, limit=2)
+    if n != 1:
+        return ("unsolvable" if n == 0 else "ambiguous"), b"", b""
+    grade, _ = grade_puzzle(board)
+    solution = board.copy()
+    solve_with_mrv(solution, peek_seconds=0.0, instant=True)
+    return grade, bytes(board.cells), bytes(solution.cells)
+
+def run_build_bank(paths: List[str], output: Optional[str] = None, workers: Optional[int] = None,
+                   chunk_size: int = BATCH_CHUNK_SIZE) -> int:
+    """Grade every puzzle in `paths` over a process pool and write them to a puzzle bank.
+
+    Each puzzle is stamped easy / medium / hard by `grade_puzzle` (MRV
+    search effort). Duplicates, malformed lines and puzzles without exactly
+    one solution are left out. A summary goes to stderr.
+    """
+    output = output or os.path.join(os.path.dirname(os.path.abspath(__file__)), PUZZLE_BANK_FILE)
+    lines, seen = [], set()
+    skipped = {"duplicate": 0, "invalid": 0, "unsolvable": 0, "ambiguous": 0}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for ln in f:
+                ln = ln.strip()
+                if not ln or ln.startswith("#"):
+                    continue
+                if ln in seen:
+                    skipped["duplicate"] += 1
+                    continue
+                seen.add(ln)
+                lines.append(ln)
+    workers = max(1, workers or os.cpu_count() or 1)
+    tiers = {name: [] for name in GENERATOR_TARGET_CLUES}
+    graded = set()
+    t0 = time.perf_counter()
+    if workers == 1:
+        results = list(map(_bank_worker, lines))
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_bank_worker, lines, chunksize=max(1, chunk_size)))
+    for grade, puzzle, solution in results:
+        if not puzzle:
+            skipped[grade] += 1
+        elif puzzle not in graded:       # same grid written two ways ('.' vs '0')
+            graded.add(puzzle)
+            tiers.setdefault(grade, []).append((Board(bytearray(puzzle)), Board(bytearray(solution))))
+        else:
+            skipped["duplicate"] += 1
+    PuzzleBank.write(output, tiers)
+    elapsed = time.perf_counter() - t0
+    total = sum(len(v) for v in tiers.values())
+    print(f"Built {output}: {total} puzzles in {elapsed:.2f}s — " +
+          ", ".join(f"{k}: {len(v)}" for k, v in tiers.items()) + "; skipped " +
+          ", ".join(f"{k}: {v}" for k, v in skipped.items()), file=sys.stderr)
+    return 0 if total else 2
+
+# ======================= Frame playback =======================
+
+@dataclass
+class FrameStats:
+    """Playback of one animation: frames shown, dropped to keep time, and shown late."""
+    shown: int = 0
+    dropped: int = 0
+    late: int = 0
+
+def frame_schedule(count: int, fps: float, stats: FrameStats) -> Iterator[int]:
+    """Indices of the frames to show, on an absolute clock: frame k is due at start + k / fps.
+
+    Waiting for each frame's own due time (not a fixed sleep after the last
+    one) keeps render time from adding up to drift. A frame shown more than
+    half an interval after its due time counts as late; once a whole
+    interval has slipped, frames whose slot is over are dropped instead of
+    rushed out (the last one is always shown). fps <= 0: no waiting.
+    """
+    if fps <= 0:
+        stats.shown += count
+        yield from range(count)
+        return
+    interval = 1.0 / fps
+    start = time.monotonic()
+    k = 0
+    while k < count:
+        behind = time.monotonic() - (start + k * interval)
+        if behind < 0:
+            time.sleep(-behind)
+        elif behind >= interval and k < count - 1:
+            skip = min(int(behind / interval), count - 1 - k)
+            stats.dropped += skip
+            k += skip
+            continue
+        elif behind > interval / 2:
+            stats.late += 1
+        stats.shown += 1
+        yield k
+        k += 1
+
+def _freeze(renderable, con=None):
+    """Render once to Rich segments; showing the result again costs no layout work."""
+    _need_rich("_freeze")
+    con = con or console
+    lines = con.render_lines(renderable, con.options, pad=False, new_lines=True)
+    return Segments([seg for line in lines for seg in line])
 
 # ======================= Curtain reveal =======================
 
-def curtain_reveal(board: List[List[int]], pause: float = CURTAIN_PAUSE) -> None:
-    if RICH:
-        temp = [[0]*9 for _ in range(9)]
-        with Live(render_board(temp, title="Solved Sudoku (revealing…)"),
-                  console=console, refresh_per_second=30) as live:
-            for r in range(9):
-                temp[r] = board[r][:]
-                live.update(render_board(temp, title="Solved Sudoku (revealing…)"))
-                time.sleep(pause)
+def curtain_reveal(board: Board, pause: float = CURTAIN_PAUSE) -> FrameStats:
+    """Reveal the solution row by row: every frame is rendered up front, then played on a frame clock."""
+    board = as_board(board)
+    temp = Board(size=board.size)
+    stats = FrameStats()
+    rich = _load_rich()
+    frames = []
+    for r in range(board.size):
+        temp[r][:] = board[r]
+        frame = render_board(temp, title="Solved Sudoku (revealing…)")
+        frames.append(_freeze(frame) if rich else frame)
+    fps = 1.0 / pause if pause > 0 else 0.0
+    if rich:
+        with Live(frames[0], console=console, auto_refresh=False) as live:
+            for k in frame_schedule(len(frames), fps, stats):
+                live.update(frames[k], refresh=True)
         console.print(render_board(board, title="Solved Sudoku"))
     else:
-        temp = [[0]*9 for _ in range(9)]
-        for r in range(9):
-            temp[r] = board[r][:]
-            print(render_board(temp, title="Solved Sudoku (revealing…)"))
-            time.sleep(pause)
+        for k in frame_schedule(len(frames), fps, stats):
+            print(frames[k])
         print(render_board(board, title="Solved Sudoku"))
+    return stats
 
 # ======================= Victory party (emoji flood + music) =======================
 
-def victory_party_dance(skip: bool = False) -> None:
-    if skip:
-        return
-
-    # Start music in background (plays once; keep your mp3 ~ DANCE_SECONDS)
-    if playsound and os.path.exists(PARTY_MUSIC_FILE):
-        threading.Thread(target=play_party_music, daemon=True).start()
+_PARTY_FRAMES: list = []    # one pre-rendered period of the dance, built on first use
 
+def _party_frames() -> list:
+    """The dance loop as frozen frames; the row rotation and colours repeat, so one period is enough."""
+    if _PARTY_FRAMES:
+        return _PARTY_FRAMES
+    _need_rich("_party_frames")
     balloons  = ["🎈"] * 3 + ["🎉", "🎊", "✨"] + ["🎈"] * 3 + ["🎉", "🎊", "✨"]
     champagne = ["🍾", "🥂"] * 3
     streamers = ["✨", "💫", "⭐"] * 2
-    base_tokens = balloons + champagne + streamers
-    row = deque(base_tokens)
+    tokens = balloons + champagne + streamers
+    n = len(tokens)
+    turn = sum(1 + k for k in range(6))                  # row rotation per frame
+    period = math.lcm(n // math.gcd(turn, n), 4)         # colours repeat every 4 frames
+    pulse = " ".join(["🎈", "🍾", "🎊", "🥂", "✨", "🎉", "🥂", "🍾", "🎈"])
+    shift = 0
+    for i in range(period):
+        lines = []
+        for k in range(6):
+            shift = (shift + 1 + k) % n
+            lines.append(" ".join(tokens[n - shift:] + tokens[:n - shift]))
+        # center pulse line
+        center = f"[bold magenta]{pulse}[/bold magenta]" if i % 2 == 0 else f"[bold yellow]{pulse}[/bold yellow]"
+        art = "\n".join(lines[:3] + [center] + lines[3:])
+        border = "cyan" if (i // 2) % 2 == 0 else "magenta"
+        _PARTY_FRAMES.append(_freeze(Panel(Align.center(art, vertical="middle"),
+                                           border_style=border, width=PARTY_WIDTH)))
+    return _PARTY_FRAMES
+
+def victory_party_dance(skip: bool = False) -> FrameStats:
+    stats = FrameStats()
+    if skip:
+        return stats
 
-    def line_from_row():
-        return " ".join(list(row))
+    # Start music in background (plays once; keep your mp3 ~ DANCE_SECONDS)
+    if _playsound() and os.path.exists(PARTY_MUSIC_FILE):
+        threading.Thread(target=play_party_music, daemon=True).start()
 
-    if RICH:
+    if _load_rich():
+        frames = _party_frames()
         console.print(Panel.fit("🍾🎉  LET’S CELEBRATE!  🎉🍾",
                                 title="VICTORY!", border_style="bright_green"))
         total_frames = max(1, int(DANCE_SECONDS * DANCE_FPS))
-        t0 = time.time()
-
-        def frame(i: int):
-            lines = []
-            for k in range(6):
-                row.rotate(1 + k)
-                lines.append(line_from_row())
-            # center pulse line
-            pulse = " ".join(["🎈", "🍾", "🎊", "🥂", "✨", "🎉", "🥂", "🍾", "🎈"])
-            center = f"[bold magenta]{pulse}[/bold magenta]" if i % 2 == 0 else f"[bold yellow]{pulse}[/bold yellow]"
-            art = "\n".join(lines[:3] + [center] + lines[3:])
-            border = "cyan" if (i // 2) % 2 == 0 else "magenta"
-            return Panel(Align.center(art, vertical="middle"),
-                         border_style=border, width=PARTY_WIDTH)
-
-        with Live(frame(0), console=console, refresh_per_second=DANCE_FPS) as live:
-            for i in range(1, total_frames + 1):
-                live.update(frame(i))
-                target = t0 + i / max(1, DANCE_FPS)
-                sleep_left = target - time.time()
-                if sleep_left > 0:
-                    time.sleep(sleep_left)
+        with Live(frames[0], console=console, auto_refresh=False) as live:
+            for i in frame_schedule(total_frames + 1, DANCE_FPS, stats):
+                live.update(frames[i % len(frames)], refresh=True)
 
         # EMOJI FLOOD FINALE 🌊🎉
         finale = " ".join(["🎈"] * 24 + ["🍾", "🥂"] * 12 + ["🎉", "🎊", "✨"] * 8)
@@ -455,6 +3029,591 @@ def victory_party_dance(skip: bool = False) -> None:
         print("\nVICTORY! CHEERS! 🎉🍾")
         # simple text-mode splash
         print(("🎈🍾🎊✨ " * 12).strip())
+    return stats
+
+# ======================= Batch mode =======================
+
+def _batch_solve(line: str, engine: str = "mrv", timeout: Optional[float] = None,
+                 max_nodes: Optional[int] = None) -> Tuple[Optional[str], float, Optional[str]]:
+    """Worker: solve one puzzle line headless.
+
+    Returns (solution or None, seconds, why the budget stopped it or None).
+    """
+    t0 = time.perf_counter()
+    try:
+        board = Board.parse(line)
+    except ValueError:
+        return None, time.perf_counter() - t0, None
+    budget = SolveBudget(timeout, max_nodes) if timeout is not None or max_nodes is not None else None
+    res = ENGINES[engine](board, peek_seconds=0.0, instant=True, budget=budget)
+    return (board_to_string(board) if res else None), time.perf_counter() - t0, res.stopped
+
+_SOLVE_CACHES: dict = {}     # (path, engine) -> SolveCache, one per worker process
+
+def _batch_solve_cached(line: str, engine: str = "mrv", cache_path: str = "",
+                        timeout: Optional[float] = None, max_nodes: Optional[int] = None) -> tuple:
+    """Worker: `_batch_solve` through this process's `SolveCache`.
+
+    Returns (solution or None, seconds, stop reason or None, hit kind,
+    canonicalization + lookup seconds, solve seconds saved).
+    """
+    t0 = time.perf_counter()
+    try:
+        board = Board.parse(line)
+    except ValueError:
+        return None, time.perf_counter() - t0, None, "invalid", 0.0, 0.0
+    cache = _SOLVE_CACHES.get((cache_path, engine))
+    if cache is None:
+        cache = _SOLVE_CACHES[(cache_path, engine)] = SolveCache(cache_path or None, engine=engine)
+    spent, saved = cache.canon_seconds + cache.lookup_seconds, cache.saved_seconds
+    budget = SolveBudget(timeout, max_nodes) if timeout is not None or max_nodes is not None else None
+    solution, hit = cache.solve(board, budget)
+    return ((board_to_string(solution) if solution is not None else None), time.perf_counter() - t0,
+            budget.reason if hit == "stopped" else None, hit,
+            cache.canon_seconds + cache.lookup_seconds - spent, cache.saved_seconds - saved)
+
+def _batch_solve_chunk(lines: List[str], engine: str = "mrv", timeout: Optional[float] = None,
+                      max_nodes: Optional[int] = None) -> List[Tuple[Optional[str], float, Optional[str]]]:
+    """Worker: `solve_many` over a chunk of lines; times are the chunk's time per puzzle.
+
+    The budget applies per puzzle; a puzzle it stopped is reported as "stopped".
+    """
+    t0 = time.perf_counter()
+    out: List[Optional[str]] = [None] * len(lines)
+    stopped: List[Optional[str]] = [None] * len(lines)
+    boards, where = [], []
+    for k, line in enumerate(lines):
+        try:
+            board = Board.parse(line)
+        except ValueError:
+            continue
+        if board.size == 9:
+            boards.append(board)
+            where.append(k)
+            continue
+        budget = SolveBudget(timeout, max_nodes) if timeout is not None or max_nodes is not None else None
+        res = ENGINES[engine](board, peek_seconds=0.0, instant=True, budget=budget)
+        if res:
+            out[k] = board_to_string(board)
+        stopped[k] = res.stopped
+    reasons: List[Optional[str]] = []
+    grids = solve_many(boards, engine, timeout=timeout, max_nodes=max_nodes, reasons=reasons)
+    for k, grid, why in zip(where, grids, reasons):
+        if grid is not None:
+            out[k] = board_to_string(grid)
+        stopped[k] = why
+    secs = (time.perf_counter() - t0) / max(1, len(lines))
+    return [(solution, secs, why) for solution, why in zip(out, stopped)]
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0..100) of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, int(round(q / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[k]
+
+def run_batch(path: str, output: Optional[str] = None, workers: Optional[int] = None,
+              chunk_size: int = BATCH_CHUNK_SIZE, engine: str = "mrv",
+              vectorized: bool = False, solve_cache: Optional[str] = None,
+              timeout: Optional[float] = None, max_nodes: Optional[int] = None) -> int:
+    """Solve every puzzle in `path` (one per line) over a process pool.
+
+    Solutions are written in input order, one 81-digit line each; lines that are
+    malformed or unsolvable are echoed back unchanged. The throughput / latency
+    report goes to stderr so stdout stays a clean solution stream. With
+    `vectorized`, each worker task runs `solve_many` on a chunk (latencies are
+    then per-chunk averages). With `solve_cache` (a file, "" for the default
+    one) every puzzle goes through a `SolveCache` and the report adds hit
+    rates and the canonicalization cost against the solve time saved.
+    `timeout` (seconds) and `max_nodes` cap the search per puzzle; puzzles
+    that hit the cap are echoed back like unsolvable ones and counted apart.
+    """
+    with open(path, encoding="utf-8") as f:
+        lines = [ln.strip() for ln in f]
+    lines = [ln for ln in lines if ln and not ln.startswith("#")]
+    workers = max(1, workers or os.cpu_count() or 1)
+    limits = {"timeout": timeout, "max_nodes": max_nodes}
+    solve_line = partial(_batch_solve, engine=engine, **limits)
+    if solve_cache is not None:
+        solve_line = partial(_batch_solve_cached, engine=engine, cache_path=solve_cache, **limits)
+
+    out = open(output, "w", encoding="utf-8") if output else sys.stdout
+    latencies = []
+    failed = 0
+    stopped = {}
+    hits = {"memory": 0, "disk": 0, "miss": 0, "skip": 0, "stopped": 0, "invalid": 0}
+    spent = saved = 0.0
+    t0 = time.perf_counter()
+    try:
+        pool = None
+        if workers > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            pool = ProcessPoolExecutor(max_workers=workers)
+        if vectorized:
+            step = max(1, chunk_size)
+            chunks = [lines[i:i + step] for i in range(0, len(lines), step)]
+            solve_chunk = partial(_batch_solve_chunk, engine=engine, **limits)
+            done = pool.map(solve_chunk, chunks) if pool else map(solve_chunk, chunks)
+            results = (r for chunk in done for r in chunk)
+        elif pool is None:
+            results = map(solve_line, lines)
+        else:
+            results = pool.map(solve_line, lines, chunksize=max(1, chunk_size))
+        try:
+            for line, result in zip(lines, results):
+                solution, secs, why = result[:3]
+                if why:
+                    stopped[why] = stopped.get(why, 0) + 1
+                if len(result) > 3:
+                    hits[result[3]] += 1
+                    spent += result[4]
+                    saved += result[5]
+                latencies.append(secs)
+                if solution is None:
+                    failed += 1
+                out.write((solution or line) + "\n")
+        finally:
+            if pool is not None:
+                pool.shutdown()
+    finally:
+        for cache in _SOLVE_CACHES.values():
+            cache.close()
+        _SOLVE_CACHES.clear()
+        if out is not sys.stdout:
+            out.close()
+        else:
+            out.flush()
+    elapsed = time.perf_counter() - t0
+
+    latencies.sort()
+    n = len(lines)
+    rate = n / elapsed if elapsed > 0 else 0.0
+    print(f"Solved {n - failed}/{n} puzzles in {elapsed:.2f}s "
+          f"({rate:.1f} puzzles/s, {workers} worker(s), chunk {chunk_size})", file=sys.stderr)
+    print("Latency ms: " + "  ".join(
+        f"p{q}={percentile(latencies, q) * 1000:.2f}" for q in (50, 90, 99)
+    ) + f"  max={(latencies[-1] if latencies else 0.0) * 1000:.2f}", file=sys.stderr)
+    if stopped:
+        print(f"Stopped by the budget: {sum(stopped.values())} (" +
+              ", ".join(f"{k}: {v}" for k, v in sorted(stopped.items())) + ")", file=sys.stderr)
+    if solve_cache is not None:
+        looked_up = hits["memory"] + hits["disk"] + hits["miss"]
+        rate = (looked_up - hits["miss"]) / looked_up if looked_up else 0.0
+        print(f"Solve cache: {rate:.1%} hits (memory {hits['memory']}, disk {hits['disk']}, "
+              f"miss {hits['miss']}, skipped {hits['skip']}); canonicalization {spent:.3f}s "
+              f"vs {saved:.3f}s of solving saved (net {saved - spent:+.3f}s)", file=sys.stderr)
+    return 0 if failed == 0 else 2
+
+def read_puzzles(stream) -> Iterator[str]:
+    """Puzzle lines from a text stream as they arrive (blank lines and # comments skipped)."""
+    for ln in stream:
+        ln = ln.strip()
+        if ln and not ln.startswith("#"):
+            yield ln
+
+def run_pipe(stdin=None, stdout=None, engine: str = "mrv", flush_lines: int = PIPE_FLUSH_LINES,
+             solve_cache: Optional[str] = None, timeout: Optional[float] = None,
+             max_nodes: Optional[int] = None) -> int:
+    """Solve puzzles from `stdin` to `stdout` one line at a time, in this process.
+
+    Output follows the `run_batch` format (malformed, unsolvable or stopped
+    lines are echoed back) and is written `flush_lines` solutions at a time,
+    so memory stays flat however long the input is. A one-line summary goes
+    to stderr. A closed reader (`| head`) ends the run quietly.
+    """
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    limits = {"timeout": timeout, "max_nodes": max_nodes}
+    solve_line = partial(_batch_solve, engine=engine, **limits)
+    if solve_cache is not None:
+        solve_line = partial(_batch_solve_cached, engine=engine, cache_path=solve_cache, **limits)
+    flush_lines = max(1, flush_lines)
+    block = []
+    n = failed = 0
+    stopped = {}
+    t0 = time.perf_counter()
+    try:
+        for line in read_puzzles(stdin):
+            solution, _secs, why = solve_line(line)[:3]
+            n += 1
+            if solution is None:
+                failed += 1
+                if why:
+                    stopped[why] = stopped.get(why, 0) + 1
+            block.append((solution or line) + "\n")
+            if len(block) >= flush_lines:
+                stdout.write("".join(block))
+                stdout.flush()
+                block.clear()
+        stdout.write("".join(block))
+        stdout.flush()
+    except BrokenPipeError:
+        # Point stdout at /dev/null so the interpreter's final flush doesn't fail again.
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, stdout.fileno())
+        return 0
+    finally:
+        for cache in _SOLVE_CACHES.values():
+            cache.close()
+        _SOLVE_CACHES.clear()
+    elapsed = time.perf_counter() - t0
+    rate = n / elapsed if elapsed > 0 else 0.0
+    print(f"Solved {n - failed}/{n} puzzles in {elapsed:.2f}s ({rate:.1f} puzzles/s)" +
+          (f"; stopped by the budget: {sum(stopped.values())}" if stopped else ""), file=sys.stderr)
+    return 0 if failed == 0 else 2
+
+# ======================= Solve service (HTTP) =======================
+
+def _serve_chunk(jobs: List[Tuple[str, float]], engine: str = "mrv",
+                 max_nodes: Optional[int] = None) -> List[Tuple[Optional[str], float, Optional[str]]]:
+    """Worker: solve one service batch puzzle by puzzle, each within its (line, seconds left).
+
+    Returns (solution or None, seconds, stop reason or None) each.
+    """
+    return [_batch_solve(line, engine, timeout=left, max_nodes=max_nodes) for line, left in jobs]
+
+def _ignore_sigint() -> None:
+    """Pool initializer: Ctrl+C is for the parent, which shuts the pool down itself."""
+    import signal
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+class _SolveJob:
+    """One queued /solve request; the HTTP thread waits on `done` until `deadline` (monotonic)."""
+
+    __slots__ = ("line", "deadline", "done", "solution", "seconds", "stopped", "expired")
+
+    def __init__(self, line: str, deadline: float):
+        self.line = line
+        self.deadline = deadline
+        self.done = threading.Event()
+        self.solution: Optional[str] = None
+        self.seconds = 0.0
+        self.stopped: Optional[str] = None
+        self.expired = False
+
+class SolveService:
+    """Process pool behind a bounded request queue.
+
+    HTTP threads `submit()` a puzzle line and wait on the job. A dispatcher
+    thread drains the queue into batches of up to `batch_size` lines (waiting
+    at most `batch_wait` seconds for one to fill) and keeps at most two
+    batches per worker in flight, so any backlog stays in the queue where
+    `metrics()` can see it. Jobs whose caller gave up are dropped unsolved;
+    the others are solved under a `SolveBudget` that ends at their deadline
+    (and `max_nodes`), so one pathological grid can't hold a worker.
+    """
+
+    def __init__(self, workers: Optional[int] = None, engine: str = "mrv",
+                 queue_size: int = SERVE_QUEUE_SIZE, batch_size: int = SERVE_BATCH_SIZE,
+                 batch_wait: float = SERVE_BATCH_WAIT, max_nodes: Optional[int] = None):
+        import queue
+        from concurrent.futures import ProcessPoolExecutor
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.engine = engine
+        self.max_nodes = max_nodes
+        self.batch_size = max(1, batch_size)
+        self.batch_wait = max(0.0, batch_wait)
+        self.queue = queue.Queue(maxsize=max(1, queue_size))
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_ignore_sigint)
+        self.slots = threading.Semaphore(2 * self.workers)
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=SERVE_LATENCY_WINDOW)
+        self.counts = {"solved": 0, "unsolvable": 0, "invalid": 0, "timeout": 0, "rejected": 0}
+        self.budget_stops = 0
+        self.batches = self.batched = self.dropped = self.in_flight = self.max_depth = 0
+        self.started = time.time()
+        self.thread = threading.Thread(target=self._dispatch, name="solve-dispatch", daemon=True)
+        self.thread.start()
+
+    def submit(self, line: str, timeout: float = SERVE_TIMEOUT) -> Optional[_SolveJob]:
+        """Queue one puzzle line to be answered within `timeout` seconds; None when the queue is full."""
+        import queue
+        job = _SolveJob(line, time.monotonic() + timeout)
+        try:
+            self.queue.put_nowait(job)
+        except queue.Full:
+            self.record("rejected")
+            return None
+        depth = self.queue.qsize()
+        with self.lock:
+            self.max_depth = max(self.max_depth, depth)
+        return job
+
+    def record(self, outcome: str, seconds: Optional[float] = None) -> None:
+        with self.lock:
+            self.counts[outcome] += 1
+            if seconds is not None:
+                self.latencies.append(seconds)
+
+    def _dispatch(self) -> None:
+        import queue
+        while True:
+            job = self.queue.get()
+            if job is None:
+                return
+            batch = [job]
+            until = time.perf_counter() + self.batch_wait
+            while len(batch) < self.batch_size:
+                try:
+                    job = self.queue.get(timeout=max(0.0, until - time.perf_counter()))
+                except queue.Empty:
+                    break
+                if job is None:
+                    self.queue.put(None)        # finish this batch, then stop
+                    break
+                batch.append(job)
+            self.slots.acquire()
+            live = [j for j in batch if not j.expired]
+            with self.lock:
+                self.dropped += len(batch) - len(live)
+                if live:
+                    self.batches += 1
+                    self.batched += len(live)
+                    self.in_flight += 1
+            if not live:
+                self.slots.release()
+                continue
+            now = time.monotonic()
+            future = self.pool.submit(_serve_chunk, [(j.line, max(0.0, j.deadline - now)) for j in live],
+                                      self.engine, self.max_nodes)
+            future.add_done_callback(partial(self._finish, live))
+
+    def _finish(self, batch: List[_SolveJob], future) -> None:
+        with self.lock:
+            self.in_flight -= 1
+        self.slots.release()
+        try:
+            results = future.result()
+        except Exception:
+            results = [(None, 0.0, None)] * len(batch)
+        for job, (solution, secs, why) in zip(batch, results):
+            job.solution, job.seconds, job.stopped = solution, secs, why
+            if why:
+                with self.lock:
+                    self.budget_stops += 1
+            job.done.set()
+
+    def metrics(self) -> dict:
+        """Counters, queue depth, batching and a latency summary over the recent window."""
+        with self.lock:
+            lat = sorted(self.latencies)
+            counts = dict(self.counts)
+            batches, batched, dropped = self.batches, self.batched, self.dropped
+            budget_stops = self.budget_stops
+            in_flight, max_depth = self.in_flight, self.max_depth
+        latency = {f"p{q}": round(percentile(lat, q) * 1000, 3) for q in (50, 90, 99)}
+        latency.update(max=round((lat[-1] if lat else 0.0) * 1000, 3), window=len(lat))
+        return {
+            "uptime_seconds": round(time.time() - self.started, 3),
+            "workers": self.workers,
+            "engine": self.engine,
+            "requests": counts,
+            "queue": {"depth": self.queue.qsize(), "max_depth": max_depth,
+                      "capacity": self.queue.maxsize},
+            "batches": {"count": batches, "mean_size": round(batched / batches, 2) if batches else 0.0,
+                        "in_flight": in_flight, "dropped_jobs": dropped,
+                        "budget_stops": budget_stops},
+            "latency_ms": latency,
+        }
+
+    def close(self) -> None:
+        self.queue.put(None)
+        self.thread.join(timeout=5.0)
+        self.pool.shutdown(cancel_futures=True)
+
+def make_solve_server(service: SolveService, host: str = "127.0.0.1", port: int = 0,
+                      timeout: float = SERVE_TIMEOUT):
+    """HTTP front end for `service`: POST /solve and GET /metrics (JSON).
+
+    /solve takes {"puzzle": <list or string, as for normalize_board>,
+    "timeout": <seconds, optional>} and answers {"solved", "solution",
+    "seconds"} with the solution in the puzzle's shape; 400 for a malformed
+    puzzle, 503 when the queue is full and 504 when the timeout passes (in
+    the queue or in the solver, whose search stops at the same deadline).
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def reply(self, code: int, data: dict) -> None:
+            payload = json.dumps(data).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            if code == 503:
+                self.send_header("Retry-After", "1")
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if self.path.rstrip("/") == "/metrics":
+                self.reply(200, service.metrics())
+            else:
+                self.reply(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path.rstrip("/") != "/solve":
+                self.reply(404, {"error": "not found"})
+                return
+            t0 = time.perf_counter()
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                puzzle = body["puzzle"]
+                line = board_to_string(Board.parse(puzzle))
+                wait = min(timeout, float(body.get("timeout", timeout)))
+            except (ValueError, KeyError, TypeError) as e:
+                service.record("invalid")
+                self.reply(400, {"error": f"bad request: {e}"})
+                return
+            job = service.submit(line, max(0.0, wait))
+            if job is None:
+                self.reply(503, {"error": "queue full"})
+                return
+            if not job.done.wait(max(0.0, wait)) or job.stopped:
+                job.expired = True
+                service.record("timeout")
+                self.reply(504, {"error": f"timed out after {wait:g}s"
+                                 if job.stopped in (None, "timeout") else f"stopped: {job.stopped}"})
+                return
+            solution = job.solution
+            service.record("solved" if solution else "unsolvable", time.perf_counter() - t0)
+            if solution and isinstance(puzzle, list):
+                solution = Board.parse(solution).to_list()
+            self.reply(200, {"solved": solution is not None, "solution": solution,
+                             "seconds": round(job.seconds, 6)})
+
+        def log_message(self, fmt, *args):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        daemon_threads = True
+        request_queue_size = 128         # listen backlog; the default 5 makes bursts retry SYNs
+
+    return Server((host, port), Handler)
+
+def run_serve(address: str, workers: Optional[int] = None, engine: str = "mrv",
+              queue_size: int = SERVE_QUEUE_SIZE, batch_size: int = SERVE_BATCH_SIZE,
+              timeout: float = SERVE_TIMEOUT, max_nodes: Optional[int] = None) -> int:
+    """Serve /solve and /metrics on `address` ([HOST:]PORT) until Ctrl+C or SIGTERM.
+
+    Either way the HTTP server is stopped and the worker pool shut down, so
+    no solver process outlives the service.
+    """
+    import signal
+    host, _, port = address.rpartition(":")
+    service = SolveService(workers, engine, queue_size=queue_size, batch_size=batch_size,
+                           max_nodes=max_nodes)
+    try:
+        server = make_solve_server(service, host or "127.0.0.1", int(port), timeout=timeout)
+    except BaseException:
+        service.close()
+        raise
+    host, port = server.server_address[:2]
+    print(f"Solving on http://{host}:{port}/solve  (metrics: /metrics; {service.workers} worker(s), "
+          f"batch {service.batch_size}, queue {queue_size}; Ctrl+C to stop)", file=sys.stderr)
+    on_term = threading.current_thread() is threading.main_thread()
+    if on_term:
+        # shutdown() waits for serve_forever() to return, so it can't run on this thread.
+        previous = signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(
+            target=server.shutdown, daemon=True).start())
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if on_term:
+            signal.signal(signal.SIGTERM, previous)
+        server.server_close()
+        service.close()
+        counts = service.metrics()["requests"]
+        print("\n" + ", ".join(f"{k}: {v}" for k, v in counts.items()), file=sys.stderr)
+    return 0
+
+# ======================= Startup timings =======================
+
+def _timed(fn, *args, **kwargs):
+    """Run fn; returns (result, seconds). Used for background startup work."""
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - t0
+
+def _in_background(name: str, fn, *args, **kwargs):
+    """Start `_timed(fn, ...)` on a daemon thread; returns a Future for (result, seconds).
+
+    A daemon thread, so Ctrl+C exits at once even while a fetch is still waiting
+    on the network (a pool's worker threads are joined at interpreter exit).
+    """
+    from concurrent.futures import Future
+    future = Future()
+    future.set_running_or_notify_cancel()
+
+    def run():
+        try:
+            future.set_result(_timed(fn, *args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name=name, daemon=True).start()
+    return future
+
+class _phase:
+    """`with _phase(timings, name):` appends (name, seconds) to `timings`."""
+
+    def __init__(self, timings: list, name: str):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timings.append((self.name, time.perf_counter() - self.t0))
+        return False
+
+def print_timings(timings: List[Tuple[str, float]]) -> None:
+    if _load_rich():
+        t = Table(title="⏱ Startup timings", box=box.SIMPLE, border_style="cyan")
+        t.add_column("Phase")
+        t.add_column("Seconds", justify="right")
+        for name, secs in timings:
+            t.add_row(name, f"{secs:.3f}")
+        console.print(t)
+    else:
+        print("\nStartup timings:")
+        for name, secs in timings:
+            print(f"  {name:<34} {secs:8.3f}s")
+
+def print_frame_stats(rows: List[Tuple[str, FrameStats]]) -> None:
+    """--timings: frames shown / dropped / late per animation."""
+    text = "; ".join(f"{name}: {st.shown} shown, {st.dropped} dropped, {st.late} late" for name, st in rows)
+    if _load_rich():
+        console.print(f"[dim]Animation frames — {text}[/dim]")
+    else:
+        print(f"Animation frames — {text}")
+
+def print_stats(stats: SolveStats, engine: str, solved: bool, fmt: str = "text",
+                stopped: Optional[str] = None) -> None:
+    """Solver counters for --stats: a table, or one JSON object per line with fmt="json"."""
+    if fmt == "json":
+        print(json.dumps({"engine": engine, "solved": solved, "stopped": stopped, **asdict(stats)}),
+              flush=True)
+        return
+    rows = [("engine", engine), ("solved", "yes" if solved else f"no ({stopped})" if stopped else "no")]
+    for name, value in asdict(stats).items():
+        rows.append((name.replace("_", " "),
+                     f"{value:.4f}" if isinstance(value, float) else str(value)))
+    if _load_rich():
+        t = Table(title="📊 Solver stats", box=box.SIMPLE, border_style="cyan")
+        t.add_column("Counter")
+        t.add_column("Value", justify="right")
+        for name, value in rows:
+            t.add_row(name, value)
+        console.print(t)
+    else:
+        print("\nSolver stats:")
+        for name, value in rows:
+            print(f"  {name:<20} {value:>10}")
 
 # ======================= Main =======================
 
@@ -469,16 +3628,247 @@ def main(argv: Optional[List[str]] = None) -> int:
     parser.add_argument("--no-countdown", action="store_true", help="Skip the big 5..1 intro.")
     parser.add_argument("--no-party", action="store_true", help="Skip celebration animation & music.")
     parser.add_argument("--instant", action="store_true", help="Headless-fast mode (no animations).")
-    parser.add_argument("--offline", action="store_true", help="Use built-in puzzle/solution; no network.")
+    parser.add_argument("--offline", action="store_true",
+                        help="Pick a puzzle from the bundled puzzle bank; no network.")
+    parser.add_argument("--bank", metavar="FILE", default=None,
+                        help=f"Puzzle bank for --offline and API failures (default: {PUZZLE_BANK_FILE} "
+                             "next to this script).")
+    parser.add_argument("--build-bank", nargs="+", metavar="FILE", default=None,
+                        help="Grade the puzzles in FILE(s) by solver effort and write a puzzle bank "
+                             "to -o (default: the bundled one), then exit.")
+    parser.add_argument("--timings", action="store_true",
+                        help="Print a per-phase startup timing breakdown at the end.")
+    parser.add_argument("--stats", nargs="?", const="text", choices=["text", "json"], default=None,
+                        help="Print solver counters (nodes, backtracks, depth, phase times) "
+                             "as a table, or as JSON with --stats json.")
+    parser.add_argument("--record", metavar="FILE", default=None,
+                        help="Record the solve into a trace file; the peek then replays it "
+                             "instead of slowing the search down.")
+    parser.add_argument("--replay", metavar="FILE", default=None,
+                        help="Play back a recorded trace and exit.")
+    parser.add_argument("--fps", type=float, default=PEEK_REFRESH_PER_SECOND,
+                        help=f"Replay frames per second (default: {PEEK_REFRESH_PER_SECOND}).")
+    parser.add_argument("--replay-speed", type=int, default=1, metavar="STEPS",
+                        help="Replay: trace steps per frame (fast-forward; default: 1).")
+    parser.add_argument("--replay-seconds", type=float, default=None,
+                        help="Replay: sample the trace so it plays in this many seconds.")
+    parser.add_argument("--replay-from", type=int, default=0, metavar="STEP",
+                        help="Replay: skip ahead to this step.")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Always fetch from the API; don't use or refill the local puzzle cache.")
+    parser.add_argument("--cache-dir", default=None,
+                        help="Puzzle cache folder (default: $SUDOKU_CACHE_DIR or ~/.cache/sudokusolver).")
+    parser.add_argument("--source", choices=["api", "generator"], default="api",
+                        help="Where puzzles come from: the web API or the offline generator (default: api).")
+    parser.add_argument("--generate", type=int, metavar="N", default=None,
+                        help="Generate N puzzles of --difficulty (one per line) with the worker pool and exit.")
+    parser.add_argument("--seed", type=int, default=None, help="Generator: base random seed.")
+    parser.add_argument("--count-solutions", metavar="PUZZLE", default=None,
+                        help="Count solutions of one 81-char puzzle (up to --limit, within --timeout "
+                             "and --max-nodes) and exit.")
+    parser.add_argument("--parallel", action="store_true",
+                        help="Split one puzzle's search tree over --workers processes "
+                             "(interactive solve and --count-solutions).")
+    parser.add_argument("--check-unique", metavar="FILE", default=None,
+                        help="Check every puzzle in FILE for a unique solution and list the others.")
+    parser.add_argument("--limit", type=int, default=2,
+                        help="Solution counting: stop at this many solutions (default: 2).")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="mrv",
+                        help="Solver: bitmask MRV backtracking, Dancing Links exact cover, "
+                             "MRV on an explicit stack, or the any-size bitset engine (default: mrv).")
+    parser.add_argument("--batch", metavar="FILE", default=None,
+                        help="Solve every puzzle in FILE (one per line) headless and exit.")
+    parser.add_argument("--pipe", action="store_true",
+                        help="Solve puzzles read line by line from stdin and stream solutions to stdout.")
+    parser.add_argument("-o", "--output", metavar="FILE", default=None,
+                        help="Batch/generate/check mode: write output here instead of stdout.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Batch/generate/check/serve mode: worker processes (default: CPU count).")
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help=f"Batch mode: puzzles per worker task (default: {BATCH_CHUNK_SIZE}, "
+                             f"or {VECTOR_CHUNK_SIZE} with --vectorized; serve mode: {SERVE_BATCH_SIZE}; "
+                             f"pipe mode: solutions per output flush, {PIPE_FLUSH_LINES}).")
+    parser.add_argument("--vectorized", action="store_true",
+                        help="Batch mode: run naked/hidden singles on whole chunks at once with NumPy "
+                             "and search only the grids left unsolved.")
+    parser.add_argument("--solve-cache", nargs="?", const="", default=None, metavar="FILE",
+                        help="Batch mode: look puzzles up by symmetry-canonical form in an LRU + SQLite "
+                             f"solution cache (default file: {SOLVE_CACHE_FILE} in --cache-dir).")
+    parser.add_argument("--timeout", type=float, default=None, metavar="SECONDS",
+                        help="Give up on a puzzle after this many seconds of search "
+                             "(interactive and batch; serve mode uses --request-timeout).")
+    parser.add_argument("--max-nodes", type=int, default=None, metavar="N",
+                        help="Give up on a puzzle after N search nodes (interactive, batch and serve).")
+    parser.add_argument("--serve", metavar="[HOST:]PORT", default=None,
+                        help="Run an HTTP solve service (POST /solve, GET /metrics) on a worker pool.")
+    parser.add_argument("--queue-size", type=int, default=SERVE_QUEUE_SIZE,
+                        help=f"Serve mode: queued requests before answering 503 (default: {SERVE_QUEUE_SIZE}).")
+    parser.add_argument("--request-timeout", type=float, default=SERVE_TIMEOUT,
+                        help=f"Serve mode: default and maximum seconds per request (default: {SERVE_TIMEOUT:g}).")
     args = parser.parse_args(argv)
 
+    if args.serve:
+        try:
+            return run_serve(args.serve, workers=args.workers, engine=args.engine,
+                             queue_size=args.queue_size, batch_size=args.chunk_size or SERVE_BATCH_SIZE,
+                             timeout=args.request_timeout, max_nodes=args.max_nodes)
+        except (OSError, ValueError) as e:
+            print(f"Fatal error: {e}", file=sys.stderr)
+            return 1
+
+    if args.count_solutions is not None:
+        try:
+            st = SolveStats()
+            limit = max(2, args.limit)
+            puzzle = Board.parse(args.count_solutions)
+            budget = SolveBudget(args.timeout, args.max_nodes)
+            # Counting always runs the StepSolver search, in this process or in each worker.
+            if args.parallel:
+                counter = "parallel/stack"
+                with ParallelSolver(args.workers, args.engine) as ps:
+                    n = ps.count(puzzle, limit=limit, stats=st, budget=budget)
+            else:
+                counter = "stack"
+                n = count_solutions(puzzle, limit=limit, stats=st, budget=budget)
+        except ValueError as e:
+            print(f"Fatal error: {e}", file=sys.stderr)
+            return 1
+        stopped = None if n >= limit else budget.reason     # cut short before the count was known
+        shown = f"{n}+" if n >= limit or stopped else str(n)
+        if n >= 2:
+            verdict = "not unique"
+        elif stopped:
+            verdict = f"stopped ({stopped})"
+        else:
+            verdict = "unique" if n == 1 else "no solution"
+        print(f"{shown} solution(s), {st.nodes} nodes — {verdict}")
+        if args.stats:
+            print_stats(st, counter, verdict == "unique", args.stats, stopped)
+        return 0 if verdict == "unique" else 2
+
+    if args.parallel and args.record:
+        print("Fatal error: --record and --parallel don't combine", file=sys.stderr)
+        return 1
+
+    if args.replay:
+        try:
+            trace = SolveTrace.load(args.replay)
+            replay_trace(trace, fps=args.fps, steps_per_frame=args.replay_speed,
+                         seconds=args.replay_seconds, start=args.replay_from)
+        except KeyboardInterrupt:
+            print("\nAborted by user.")
+            return 130
+        except (OSError, ValueError) as e:
+            print(f"Fatal error: {e}", file=sys.stderr)
+            return 1
+        return 0
+
+    if args.build_bank:
+        try:
+            return run_build_bank(args.build_bank, output=args.output, workers=args.workers,
+                                  chunk_size=args.chunk_size or BATCH_CHUNK_SIZE)
+        except KeyboardInterrupt:
+            print("\nAborted by user.")
+            return 130
+        except (OSError, ValueError) as e:
+            print(f"Fatal error: {e}", file=sys.stderr)
+            return 1
+
+    if args.check_unique:
+        try:
+            return run_check_unique(args.check_unique, output=args.output, workers=args.workers,
+                                    chunk_size=args.chunk_size or BATCH_CHUNK_SIZE, limit=args.limit)
+        except KeyboardInterrupt:
+            print("\nAborted by user.")
+            return 130
+        except OSError as e:
+            print(f"Fatal error: {e}", file=sys.stderr)
+            return 1
+
+    if args.generate is not None:
+        try:
+            return run_generate(args.difficulty or "medium", args.generate, output=args.output,
+                                workers=args.workers, seed=args.seed)
+        except KeyboardInterrupt:
+            print("\nAborted by user.")
+            return 130
+        except OSError as e:
+            print(f"Fatal error: {e}", file=sys.stderr)
+            return 1
+
+    if args.batch:
+        if args.vectorized and args.solve_cache is not None:
+            print("Fatal error: --solve-cache and --vectorized don't combine", file=sys.stderr)
+            return 1
+        solve_cache = args.solve_cache
+        if solve_cache == "" and args.cache_dir:
+            solve_cache = os.path.join(args.cache_dir, SOLVE_CACHE_FILE)
+        try:
+            chunk_size = args.chunk_size or (VECTOR_CHUNK_SIZE if args.vectorized else BATCH_CHUNK_SIZE)
+            return run_batch(args.batch, output=args.output, workers=args.workers,
+                             chunk_size=chunk_size, engine=args.engine, vectorized=args.vectorized,
+                             solve_cache=solve_cache, timeout=args.timeout, max_nodes=args.max_nodes)
+        except KeyboardInterrupt:
+            print("\nAborted by user.")
+            return 130
+        except ImportError as e:
+            print(f"Fatal error: --vectorized needs NumPy ({e})", file=sys.stderr)
+            return 1
+        except OSError as e:
+            print(f"Fatal error: {e}", file=sys.stderr)
+            return 1
+
+    if args.pipe:
+        solve_cache = args.solve_cache
+        if solve_cache == "" and args.cache_dir:
+            solve_cache = os.path.join(args.cache_dir, SOLVE_CACHE_FILE)
+        try:
+            return run_pipe(engine=args.engine, flush_lines=args.chunk_size or PIPE_FLUSH_LINES,
+                            solve_cache=solve_cache, timeout=args.timeout, max_nodes=args.max_nodes)
+        except KeyboardInterrupt:
+            return 130
+        except OSError as e:
+            print(f"Fatal error: {e}", file=sys.stderr)
+            return 1
+
+    # Interactive from here on: now it is worth importing Rich.
+    _load_rich()
+    cache = None
+    if args.source == "api" and not args.offline and not args.no_cache:
+        cache = PuzzleCache(args.api_url, cache_dir=args.cache_dir)
+
+    timings = []        # (phase, seconds) for --timings
+    solved_stats = None  # (stats, ok, stopped) for --stats
+    frame_stats = []     # (animation, FrameStats) for --timings
+    cancel = CancelToken()   # stops a background solve on Ctrl+C / errors
     try:
         difficulty = args.difficulty or ask_for_difficulty()
 
+        # Fetch in the background while the intro plays.
+        t_start = time.perf_counter()
+        fetch = _in_background("startup-fetch", get_puzzle_and_solution, args.api_url, difficulty,
+                               force_offline=args.offline, source=args.source, cache=cache,
+                               bank=args.bank)
         if not args.instant:
-            loading_dots("Fetching puzzle" if not args.offline else "Loading offline puzzle", seconds=1.2)
-
-        board, api_solution, meta_diff = get_puzzle_and_solution(args.api_url, difficulty, force_offline=args.offline)
+            label = ("Loading offline puzzle" if args.offline
+                     else "Generating puzzle" if args.source == "generator" else "Fetching puzzle")
+            with _phase(timings, "intro (loading dots)"):
+                loading_dots(label, seconds=1.2, until=fetch)
+        with _phase(timings, "waiting for puzzle"):
+            (board, api_solution, meta_diff), fetch_secs = fetch.result()
+
+        # Without a visible peek the solve can run during the preview and countdown.
+        solve = (partial(solve_parallel, workers=args.workers, engine=args.engine) if args.parallel
+                 else ENGINES[args.engine])
+        peek_seconds = 0.0 if args.instant else max(0.0, args.peek_seconds)
+        board_copy = board.copy()
+        stats = SolveStats()
+        trace = SolveTrace() if args.record else None
+        presolve = None
+        if trace is not None or not (RICH and not args.instant and peek_seconds > 0.0):
+            presolve = _in_background("startup-solve", solve, board_copy, peek_seconds=0.0,
+                                      instant=True, stats=stats, timed=bool(args.stats), trace=trace,
+                                      budget=SolveBudget(args.timeout, args.max_nodes, cancel))
 
         # Show puzzle (unsolved) and hold for 3 seconds for dramatic tension
         title = f"Puzzle (difficulty: {meta_diff})"
@@ -487,23 +3877,51 @@ def main(argv: Optional[List[str]] = None) -> int:
         else:
             print(render_board(board, title=title))
         if not args.instant:
-            time.sleep(3.0)
+            with _phase(timings, "preview hold"):
+                time.sleep(3.0)
 
         # Big 5→1 countdown
-        countdown(skip=(args.no_countdown or args.instant))
+        if not (args.no_countdown or args.instant):
+            with _phase(timings, "countdown"):
+                countdown()
 
         # Solve (with quick peek window)
-        board_copy = [row[:] for row in board]
-        t0 = time.time()
-        ok = solve_with_mrv(board_copy,
-                            peek_seconds=(0.0 if args.instant else max(0.0, args.peek_seconds)),
-                            instant=args.instant)
-        elapsed = time.time() - t0
+        with _phase(timings, "waiting for solve"):
+            if presolve is not None:
+                ok, elapsed = presolve.result()
+            else:
+                t0 = time.time()
+                ok = solve(board_copy, peek_seconds=peek_seconds, instant=args.instant,
+                           stats=stats, timed=bool(args.stats),
+                           budget=SolveBudget(args.timeout, args.max_nodes, cancel))
+                elapsed = time.time() - t0
+        solved_stats = (stats, bool(ok), ok.stopped)
+        if trace is not None:
+            # The search ran at full speed; the peek is a replay of what it did.
+            if RICH and not args.instant and peek_seconds > 0.0:
+                with _phase(timings, "trace replay"):
+                    replay_trace(trace, fps=args.fps, seconds=peek_seconds, title="Solving…")
+            trace.save(args.record)
+            print(f"Trace saved: {len(trace)} steps → {args.record}")
+        if args.timings:
+            ready = time.perf_counter() - t_start
+            timings.append(("fetch (background)", fetch_secs))
+            if presolve is not None:
+                timings.append(("solve (background)", elapsed))
+            timings.append(("puzzle → solved, wall clock", ready))
+            if not args.instant:
+                # With --instant there is no intro, hold or countdown to hide the
+                # fetch and solve behind, so there is nothing to compare against.
+                phases = dict(timings)
+                serial = (1.2 + fetch_secs + phases.get("preview hold", 0.0)
+                          + phases.get("countdown", 0.0) + elapsed)
+                timings.append(("same steps run one after another", serial))
+                timings.append(("saved by overlapping", max(0.0, serial - ready)))
 
         if ok:
             # Cheers sound (Windows multi-tone; BEL elsewhere)
             try:
-                if WINSOUND:
+                if _winsound():
                     beep(880, 200)   # A5
                     beep(988, 200)   # B5
                     beep(1047, 400)  # C6
@@ -512,14 +3930,17 @@ def main(argv: Optional[List[str]] = None) -> int:
             except Exception:
                 pass
 
-            msg = f"Solved in {elapsed:.2f}s"
+            msg = (f"Solved in {elapsed:.2f}s — {stats.propagated} cells by singles, "
+                   f"{stats.searched} by search")
             if RICH:
                 console.print(Panel.fit(msg, border_style="bright_green"))
             else:
                 print("\n" + msg)
 
-            curtain_reveal(board_copy, pause=0.0 if args.instant else CURTAIN_PAUSE)
-            victory_party_dance(skip=(args.no_party or args.instant))
+            frame_stats = [
+                ("curtain reveal", curtain_reveal(board_copy, pause=0.0 if args.instant else CURTAIN_PAUSE)),
+                ("victory party", victory_party_dance(skip=(args.no_party or args.instant))),
+            ]
 
             # Compare to provided solution (if any)
             if api_solution is not None:
@@ -529,6 +3950,14 @@ def main(argv: Optional[List[str]] = None) -> int:
                 else:
                     print("\nMatches provided solution?", match)
             return 0
+        elif ok.stopped:
+            msg = (f"Gave up after {elapsed:.2f}s ({ok.stopped}): {stats.nodes} nodes, "
+                   f"{stats.backtracks} backtracks, depth {stats.max_depth}")
+            if RICH:
+                console.print(f"[yellow]{msg}[/yellow]")
+            else:
+                print(msg)
+            return 2
         else:
             if RICH:
                 console.print("[red]No solution found (unexpected for this source).[/red]")
@@ -540,11 +3969,21 @@ def main(argv: Optional[List[str]] = None) -> int:
         print("\nAborted by user.")
         return 130
     except Exception as e:
-        if RICH:
+        if _load_rich():
             console.print(f"[red]Fatal error:[/red] {e}")
         else:
             print(f"Fatal error: {e}", file=sys.stderr)
         return 1
+    finally:
+        cancel.cancel()
+        if cache is not None:
+            cache.close()
+        if args.timings and timings:
+            print_timings(timings)
+        if args.timings and frame_stats:
+            print_frame_stats(frame_stats)
+        if args.stats and solved_stats is not None:
+            print_stats(solved_stats[0], args.engine, solved_stats[1], args.stats, solved_stats[2])
 
 if __name__ == "__main__":
     sys.exit(main())
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+# -*- coding: utf-8 -*-
+
+"""
+PuzzleCache against the local stand-in API (`stub_api.py`)
+===========================================================
+
+Covers a cache hit, a miss that fills the cache in the background, a full
+cache that fetches nothing, and a slow API that must not hold up `take()`,
+`close()` or interpreter exit.
+
+Usage:
+    python -m pytest test_puzzle_cache.py
+    python -m unittest test_puzzle_cache
+"""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+import sudokusolver as ss
+from stub_api import start_stub_server
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def wait_until(check, timeout: float = 10.0) -> bool:
+    """Poll `check()` until it is true or `timeout` seconds pass."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if check():
+            return True
+        time.sleep(0.02)
+    return check()
+
+
+class PuzzleCacheTest(unittest.TestCase):
+    delay = 0.0
+
+    def setUp(self):
+        self.server = start_stub_server(delay=self.delay, seed=1)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ss.PuzzleCache(self.server.url, cache_dir=self.tmp.name, size=3, workers=2)
+
+    def tearDown(self):
+        self.cache.close(wait=5.0)
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def fill(self, difficulty: str = "easy") -> None:
+        self.cache.top_up(difficulty)
+        self.assertTrue(wait_until(lambda: self.cache.count(difficulty) == self.cache.size))
+        self.assertTrue(wait_until(lambda: self.cache.pending.get(difficulty) == 0))
+
+
+class TestCacheRoundTrip(PuzzleCacheTest):
+    def test_miss_returns_none_and_fills_in_background(self):
+        self.assertIsNone(self.cache.take("medium"))
+        self.assertTrue(wait_until(lambda: self.cache.count("medium") == 3))
+        self.assertEqual(self.server.served, 3)
+        self.assertEqual(self.cache.count("easy"), 0)
+
+    def test_hit_serves_a_stored_puzzle_and_refills_it(self):
+        self.fill()
+        served = self.server.served
+        entry = self.cache.take("easy")
+        self.assertIsNotNone(entry)
+        board = ss.Board.parse(entry["puzzle"])
+        solution = ss.Board.parse(entry["solution"])
+        self.assertTrue(ss.solve_with_mrv(board, instant=True))
+        self.assertEqual(board, solution)
+        self.assertTrue(wait_until(lambda: self.server.served == served + 1))
+        self.assertTrue(wait_until(lambda: self.cache.count("easy") == 3))
+
+    def test_full_cache_fetches_nothing(self):
+        self.fill()
+        served = self.server.served
+        self.cache.top_up("easy")
+        time.sleep(0.2)
+        self.assertEqual(self.server.served, served)
+        self.assertEqual(self.cache.count("easy"), 3)
+
+    def test_cache_survives_a_new_instance(self):
+        self.fill()
+        again = ss.PuzzleCache(self.server.url, cache_dir=self.tmp.name, size=3)
+        try:
+            self.assertEqual(again.count("easy"), 3)
+            self.assertIsNotNone(again.take("easy"))
+        finally:
+            again.close()
+
+
+class TestSlowApi(PuzzleCacheTest):
+    delay = 1.5
+
+    def test_take_and_close_do_not_wait_for_fetches(self):
+        t0 = time.monotonic()
+        self.assertIsNone(self.cache.take("hard"))       # schedules 3 slow fetches
+        self.cache.close()
+        self.assertLess(time.monotonic() - t0, 0.5)
+
+    def test_close_waits_at_most_the_given_time(self):
+        self.cache.top_up("hard")
+        time.sleep(0.1)                                  # fetches are in flight now
+        t0 = time.monotonic()
+        self.cache.close(wait=0.3)
+        self.assertLess(time.monotonic() - t0, 1.0)
+
+    def test_exit_is_not_held_up_by_a_prefetch(self):
+        # Seed one entry so the child serves from disk while its refill is still in flight.
+        entry = {"difficulty": "easy", "puzzle": ss.FALLBACK_PUZZLE, "solution": ss.FALLBACK_SOLUTION}
+        self.cache._save("easy", [entry])
+        code = ("import sudokusolver as ss, sys\n"
+                "c = ss.PuzzleCache(sys.argv[1], cache_dir=sys.argv[2], size=3)\n"
+                "assert c.take('easy') is not None\n"
+                "c.close()\n")
+        t0 = time.monotonic()
+        subprocess.run([sys.executable, "-c", code, self.server.url, self.tmp.name],
+                       cwd=HERE, check=True, timeout=30)
+        self.assertLess(time.monotonic() - t0, self.delay)
+
+
+if __name__ == "__main__":
+    unittest.main()